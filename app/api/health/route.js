@@ -1,6 +1,6 @@
 // app/api/health/route.js
 import { NextResponse } from 'next/server';
-import { getAccessToken, getOptionsChain, getQuote, getPriceHistory } from '@/lib/schwab';
+import { getAccessToken, fetchOptionsChain, getQuote, getPriceHistory } from '@/lib/schwab';
 import { getQuote as finnhubQuote, getNews, getEarnings } from '@/lib/finnhub';
 import { getPreviousClose } from '@/lib/polygon';
 
@@ -40,7 +40,7 @@ export async function GET() {
 
   // Schwab chain (NORMALIZED)
   try {
-    const chain = await getOptionsChain('SPY');
+    const chain = await fetchOptionsChain('SPY'); // uncached — must hit Schwab
     if (chain) {
       const callExpDates = chain.callExpDateMap ? Object.keys(chain.callExpDateMap) : [];
       let totalContracts = 0;
@@ -33,15 +33,19 @@ export async function GET(request) {
   }
 
   if (type === 'stats') {
-    // Return aggregate stats
-    const entries = Object.values(dailyPL);
-    const totalPL = entries.reduce((sum, d) => sum + d.pl, 0);
-    const winDays = entries.filter(d => d.pl > 0).length;
-    const lossDays = entries.filter(d => d.pl < 0).length;
-    const bestDay = entries.length > 0 ? Math.max(...entries.map(d => d.pl)) : 0;
-    const worstDay = entries.length > 0 ? Math.min(...entries.map(d => d.pl)) : 0;
-    const avgWin = winDays > 0 ? entries.filter(d => d.pl > 0).reduce((s, d) => s + d.pl, 0) / winDays : 0;
-    const avgLoss = lossDays > 0 ? entries.filter(d => d.pl < 0).reduce((s, d) => s + d.pl, 0) / lossDays : 0;
+    // Return aggregate stats — one pass over the calendar for every figure
+    let totalPL = 0, winDays = 0, lossDays = 0, winSum = 0, lossSum = 0;
+    let bestDay = -Infinity, worstDay = Infinity;
+    for (const { pl } of Object.values(dailyPL)) {
+      totalPL += pl;
+      if (pl > bestDay) bestDay = pl;
+      if (pl < worstDay) worstDay = pl;
+      if (pl > 0) { winDays++; winSum += pl; }
+      else if (pl < 0) { lossDays++; lossSum += pl; }
+    }
+    if (bestDay === -Infinity) { bestDay = 0; worstDay = 0; }
+    const avgWin = winDays > 0 ? winSum / winDays : 0;
+    const avgLoss = lossDays > 0 ? lossSum / lossDays : 0;
 
     return NextResponse.json({
       stats: {
@@ -7,10 +7,11 @@ import { NextResponse } from 'next/server';
 // Force dynamic rendering
 export const dynamic = 'force-dynamic';
 export const revalidate = 0;
-import { getOptionsChain, getPriceHistory } from '@/lib/schwab';
+import { getOptionsChain, getCachedPriceHistory, savePriceHistorySnapshot } from '@/lib/schwab';
 import { getEarnings } from '@/lib/finnhub';
-import { analyzeTechnicals, realizedVol, calculateEma200Proximity, adjustGrade } from '@/lib/technicals';
+import { analyzeTechnicals, realizedVol, calculateEma200Proximity, adjustGrade, candleSeries } from '@/lib/technicals';
 import { MIN_OI, MAX_SPREAD_PCT } from '@/lib/watchlist';
+import { mapWithConcurrency } from '@/lib/ratelimit';
 
 // LEAP ideal criteria
 const LEAP_MIN_DTE = 180;
@@ -19,6 +20,25 @@ const LEAP_DELTA_MIN = 0.45;
 const LEAP_DELTA_MAX = 0.75;
 const LEAP_MAX_THETA_PCT = 0.005; // 0.5% of contract value per week
 
+// Tickers scanned in parallel per request
+const LEAP_SCAN_CONCURRENCY = 6;
+
+// Position sizing: risk 5% of the portfolio per LEAP. The fixed reference
+// portfolios' budgets are constants — no need to rederive them per contract.
+const POSITION_RISK_PCT = 0.05;
+const BUDGET_25K = 25000 * POSITION_RISK_PCT;
+const BUDGET_50K = 50000 * POSITION_RISK_PCT;
+const BUDGET_100K = 100000 * POSITION_RISK_PCT;
+
+// 50/21 exit rules, as multiples of the entry mid
+const PROFIT_TARGET_MULT = 1.5;
+const STOP_LOSS_MULT = 0.79;
+
+// Grade lookup tables — built once instead of per contract / per call
+const GRADE_EMOJI = Object.freeze({ A: '🟢', B: '🟢', C: '🟡', D: '🟠', F: '🔴' });
+const GRADE_SCORE = Object.freeze({ A: 6, B: 5, C: 4, D: 3, F: 1 });
+const GRADE_ORDER = Object.freeze({ A: 0, B: 1, C: 2, D: 3, F: 4 });
+
 function gradeSetup(factors) {
   // factors: { ivCheap, goodDelta, liquidOI, tightSpread, noEarningsSoon, trendAligned, thetaEfficient }
   const points = Object.values(factors).filter(Boolean).length;
@@ -30,14 +50,14 @@ function gradeSetup(factors) {
 }
 
 function gradeEmoji(grade) {
-  return { A: '🟢', B: '🟢', C: '🟡', D: '🟠', F: '🔴' }[grade] || '⚪';
+  return GRADE_EMOJI[grade] || '⚪';
 }
 
 async function scanTickerForLeaps(ticker, bias, maxPremium, portfolioSize) {
   try {
     const [chain, priceHistory, earnings] = await Promise.allSettled([
       getOptionsChain(ticker),
-      getPriceHistory(ticker, 'year', 2, 'daily', 1),
+      getCachedPriceHistory(ticker, 'year', 2, 'daily', 1),
       getEarnings(ticker),
     ]);
 
@@ -50,8 +70,7 @@ async function scanTickerForLeaps(ticker, bias, maxPremium, portfolioSize) {
     const stockPrice = chainData.underlyingPrice || chainData.underlying?.last || 0;
     if (stockPrice === 0) return null;
 
-    const closePrices = historyData?.candles ? historyData.candles.map(c => c.close) : [];
-    const volumes = historyData?.candles ? historyData.candles.map(c => c.volume) : [];
+    const { closes: closePrices, volumes } = candleSeries(historyData?.candles);
     const technicals = closePrices.length >= 50 ? analyzeTechnicals(closePrices) : null;
     const rv20 = closePrices.length >= 21 ? realizedVol(closePrices, 20) : null;
 
@@ -62,9 +81,10 @@ async function scanTickerForLeaps(ticker, bias, maxPremium, portfolioSize) {
     let nearEarnings = false;
     let earningsDate = null;
     if (earningsData?.earningsCalendar) {
+      const now = Date.now();
       const upcoming = earningsData.earningsCalendar.find(e => {
         if (e.symbol !== ticker) return false;
-        const days = Math.ceil((new Date(e.date) - Date.now()) / (1000 * 60 * 60 * 24));
+        const days = Math.ceil((new Date(e.date) - now) / (1000 * 60 * 60 * 24));
         return days > 0 && days <= 14;
       });
       if (upcoming) {
@@ -79,14 +99,23 @@ async function scanTickerForLeaps(ticker, bias, maxPremium, portfolioSize) {
 
     let bestSetup = null;
     let bestScore = -1;
+    const userBudget = portfolioSize * POSITION_RISK_PCT;
+
+    // Per-ticker inputs to the grade factors — fixed for the whole chain,
+    // so resolve them once instead of per contract
+    const ivCheapBelow = rv20 ? rv20 * 1.3 : 40;
+    const maxSpreadWidth = stockPrice * 0.05; // spread alternative sells at most 5% out
+    const noEarningsSoon = !nearEarnings;
+    const trendAligned = bias === 'bullish'
+      ? (technicals?.trend === 'ABOVE_50SMA' || technicals?.rsi < 60)
+      : (technicals?.trend === 'BELOW_50SMA' || technicals?.rsi > 40);
 
     Object.entries(expMap).forEach(([expKey, contracts]) => {
       if (!Array.isArray(contracts)) return;
-      const dte = parseInt(expKey.split(':')[1]) || 0;
+      const [expDate, dteStr] = expKey.split(':');
+      const dte = parseInt(dteStr) || 0;
       if (dte < LEAP_MIN_DTE || dte > LEAP_MAX_DTE) return;
 
-      const expDate = expKey.split(':')[0];
-
       contracts.forEach(c => {
         const delta = Math.abs(c.delta || 0);
         const oi = c.openInterest || 0;
@@ -105,15 +134,16 @@ async function scanTickerForLeaps(ticker, bias, maxPremium, portfolioSize) {
         if (mid <= 0) return;
         if (premium > maxPremium) return;
 
+        // mid > 0 is guaranteed by the filter above
         const spread = ask - bid;
-        const spreadPct = mid > 0 ? spread / mid : 1;
+        const spreadPct = spread / mid;
         const thetaWeekly = theta * 5;
-        const thetaPctWeek = mid > 0 ? thetaWeekly / mid : 1;
+        const thetaPctWeek = thetaWeekly / mid;
 
         // Estimate IV rank (simplified — compare IV to realized vol)
         // IMPORTANT: Schwab returns iv as percentage already (e.g. 46.69, not 0.4669)
         const ivPct = iv; // already a percentage
-        const ivCheap = rv20 ? ivPct < rv20 * 1.3 : ivPct < 40;
+        const ivCheap = ivPct < ivCheapBelow;
 
         // Score factors
         const factors = {
@@ -121,15 +151,13 @@ async function scanTickerForLeaps(ticker, bias, maxPremium, portfolioSize) {
           goodDelta: delta >= 0.45 && delta <= 0.75,
           liquidOI: oi >= 1000,
           tightSpread: spreadPct < 0.05,
-          noEarningsSoon: !nearEarnings,
-          trendAligned: bias === 'bullish'
-            ? (technicals?.trend === 'ABOVE_50SMA' || technicals?.rsi < 60)
-            : (technicals?.trend === 'BELOW_50SMA' || technicals?.rsi > 40),
+          noEarningsSoon,
+          trendAligned,
           thetaEfficient: thetaPctWeek < LEAP_MAX_THETA_PCT,
         };
 
         const grade = gradeSetup(factors);
-        const gradeScore = { A: 6, B: 5, C: 4, D: 3, F: 1 }[grade] || 0;
+        const gradeScore = GRADE_SCORE[grade] || 0;
 
         // Prefer higher grade, then higher OI, then better delta
         const compositeScore = gradeScore * 1000 + oi * 0.01 + delta * 100;
@@ -143,21 +171,22 @@ async function scanTickerForLeaps(ticker, bias, maxPremium, portfolioSize) {
           const moveRequired = ((breakeven - stockPrice) / stockPrice) * 100;
 
           // Position sizing
-          const maxContracts25k = Math.floor((25000 * 0.05) / premium) || 1;
-          const maxContracts50k = Math.floor((50000 * 0.05) / premium) || 1;
-          const maxContracts100k = Math.floor((100000 * 0.05) / premium) || 1;
-          const maxContractsUser = Math.floor((portfolioSize * 0.05) / premium) || 1;
+          const maxContracts25k = Math.floor(BUDGET_25K / premium) || 1;
+          const maxContracts50k = Math.floor(BUDGET_50K / premium) || 1;
+          const maxContracts100k = Math.floor(BUDGET_100K / premium) || 1;
+          const maxContractsUser = Math.floor(userBudget / premium) || 1;
 
           // 50/21 exit rules
-          const profitTarget = mid * 1.5;
-          const stopLoss = mid * 0.79;
+          const profitTarget = mid * PROFIT_TARGET_MULT;
+          const stopLoss = mid * STOP_LOSS_MULT;
 
           // Spread alternative — sell next strike out
           let spreadAlt = null;
+          // The direction test already fixes the sign, so the gap needs no abs()
           const nextStrike = contracts.find(s =>
             bias === 'bullish'
-              ? s.strikePrice > c.strikePrice && Math.abs(s.strikePrice - c.strikePrice) <= stockPrice * 0.05
-              : s.strikePrice < c.strikePrice && Math.abs(s.strikePrice - c.strikePrice) <= stockPrice * 0.05
+              ? s.strikePrice > c.strikePrice && s.strikePrice - c.strikePrice <= maxSpreadWidth
+              : s.strikePrice < c.strikePrice && c.strikePrice - s.strikePrice <= maxSpreadWidth
           );
           if (nextStrike) {
             const sellMid = ((nextStrike.bid || 0) + (nextStrike.ask || 0)) / 2;
@@ -287,36 +316,27 @@ export async function POST(request) {
       portfolio_size = 50000,
     } = body;
 
-    const results = [];
-
-    // Process in batches of 3 to respect rate limits
-    for (let i = 0; i < tickers.length; i += 3) {
-      const batch = tickers.slice(i, i + 3);
-      const batchResults = await Promise.allSettled(
-        batch.map(ticker => scanTickerForLeaps(ticker, bias, max_premium, portfolio_size))
-      );
-
-      batchResults.forEach((r, idx) => {
-        if (r.status === 'fulfilled' && r.value) {
-          results.push(r.value);
-        } else {
-          results.push({
-            ticker: batch[idx],
-            grade: 'F',
-            gradeEmoji: '🔴',
-            thesis: `No suitable LEAP found for ${batch[idx]} matching your criteria.`,
-            primaryRisk: 'N/A',
-            noSetup: true,
-          });
-        }
-      });
+    // Scan tickers concurrently — the Schwab/Finnhub token buckets pace the
+    // actual requests, so no fixed batches or sleeps are needed here
+    const settled = await mapWithConcurrency(tickers, LEAP_SCAN_CONCURRENCY,
+      ticker => scanTickerForLeaps(ticker, bias, max_premium, portfolio_size));
+
+    const results = settled.map((r, idx) => {
+      if (r.status === 'fulfilled' && r.value) return r.value;
+      return {
+        ticker: tickers[idx],
+        grade: 'F',
+        gradeEmoji: '🔴',
+        thesis: `No suitable LEAP found for ${tickers[idx]} matching your criteria.`,
+        primaryRisk: 'N/A',
+        noSetup: true,
+      };
+    });
 
-      if (i + 3 < tickers.length) await new Promise(r => setTimeout(r, 500));
-    }
+    savePriceHistorySnapshot();
 
     // Sort by grade
-    const gradeOrder = { A: 0, B: 1, C: 2, D: 3, F: 4 };
-    results.sort((a, b) => (gradeOrder[a.grade] || 4) - (gradeOrder[b.grade] || 4));
+    results.sort((a, b) => (GRADE_ORDER[a.grade] || 4) - (GRADE_ORDER[b.grade] || 4));
 
     return NextResponse.json({ results, scannedAt: new Date().toISOString() });
   } catch (error) {
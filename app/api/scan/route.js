@@ -1,273 +1,352 @@
 // app/api/scan/route.js
 import { NextResponse } from 'next/server';
-import { getOptionsChain, getQuotes, getPriceHistory } from '@/lib/schwab';
-import { getNews, getEarnings } from '@/lib/finnhub';
-import { WATCHLIST, VOL_OI_THRESHOLD, MIN_PREMIUM, MIN_DTE, MAX_DTE, VIX_CAUTION, VIX_DANGER, VIX_HALT } from '@/lib/watchlist';
+import { getOptionsChain, getQuotes, getCachedPriceHistory, savePriceHistorySnapshot } from '@/lib/schwab';
+import { getQuote as finnhubQuote, getNews, getEarnings } from '@/lib/finnhub';
+import { WATCHLIST, VOL_OI_THRESHOLD, MIN_PREMIUM, MIN_DTE, MAX_DTE, VIX_CAUTION, VIX_DANGER, VIX_HALT, EXP_DATE_MAP_KEY } from '@/lib/watchlist';
 import { scoreOpportunity } from '@/lib/engine';
+import { candleSeries, analyzeTechnicals, calculateEma200Proximity } from '@/lib/technicals';
 import { getInsiderActivity } from '@/lib/edgar';
-import { calculateNetFlow, getMarketFlow } from '@/lib/netflow';
-import { getTrackedTrades, updateTrackedTrade, cleanupExpiredTrades } from '@/lib/tracker';
+import { recordNetFlow, getMarketFlow } from '@/lib/netflow';
+import { getTrackedTrades, iterActiveTrades, updateTrackedTrade, cleanupExpiredTrades } from '@/lib/tracker';
+import { mapWithConcurrency } from '@/lib/ratelimit';
 
 // Force dynamic rendering — never cache this route
 export const dynamic = 'force-dynamic';
 export const revalidate = 0;
 
-let prevScanCache = {};
-let lastInsiderCheck = {};
+// Tickers scanned in parallel — Schwab's token bucket paces the actual requests
+const SCAN_CONCURRENCY = 8;
+// Only the biggest flows per ticker are scored into cards
+const FLOWS_PER_TICKER = 3;
 
-// Cache price history per ticker for 1 hour (doesn't change intraday for daily candles)
-const priceHistoryCache = {};
-const PRICE_HISTORY_TTL = 60 * 60 * 1000; // 1 hour
+// Everything the scan remembers about a ticker between scans lives in one
+// entry, so each ticker costs one lookup instead of one per cache:
+//   { news, earnings: { data, timestamp }, insiderCheckedAt }
+// (price history is cached in lib/schwab, shared with the other routes)
+const tickerState = {};
 
-async function getCachedPriceHistory(ticker) {
-  const cached = priceHistoryCache[ticker];
-  if (cached && Date.now() - cached.timestamp < PRICE_HISTORY_TTL) {
+function stateFor(ticker) {
+  let state = tickerState[ticker];
+  if (!state) tickerState[ticker] = state = {};
+  return state;
+}
+
+// Earnings dates and news move far slower than the 60s scan — refresh them
+// per ticker only once their own TTL lapses instead of on every scan
+const EARNINGS_TTL = 6 * 60 * 60 * 1000; // 6 hours
+const NEWS_TTL = 10 * 60 * 1000; // 10 minutes
+
+async function getCached(state, field, ttl, fetcher) {
+  const cached = state[field];
+  if (cached && Date.now() - cached.timestamp < ttl) {
     return cached.data;
   }
-  const data = await getPriceHistory(ticker, 'year', 2, 'daily', 1);
-  priceHistoryCache[ticker] = { data, timestamp: Date.now() };
+  const data = await fetcher();
+  if (data) state[field] = { data, timestamp: Date.now() };
   return data;
 }
 
+function getCachedNews(state, ticker) {
+  return getCached(state, 'news', NEWS_TTL, () => getNews(ticker, 7));
+}
+
+function getCachedEarnings(state, ticker) {
+  return getCached(state, 'earnings', EARNINGS_TTL, () => getEarnings(ticker));
+}
+
+// Also sums each side's total premium across the whole chain in the same
+// pass, so the market-wide net flow doesn't need its own walk of the chain
 function detectUnusualFlow(chain, stockPrice) {
   const flows = [];
-  if (!chain) return flows;
+  const totals = { CALL: 0, PUT: 0 };
+  if (!chain) return { flows, totals };
   const processExpMap = (expMap, putCall) => {
     if (!expMap) return;
     Object.entries(expMap).forEach(([expKey, contracts]) => {
       if (!Array.isArray(contracts)) return;
-      const dte = parseInt(expKey.split(':')[1]) || 0;
-      if (dte < MIN_DTE || dte > MAX_DTE) return;
+      // expKey format: "2026-04-18:31" (date:dte) — split once per expiration
+      const [expiration, dteStr] = expKey.split(':');
+      const dte = parseInt(dteStr) || 0;
+      const inWindow = dte >= MIN_DTE && dte <= MAX_DTE;
       contracts.forEach(c => {
         const volume = c.totalVolume || 0;
-        const oi = c.openInterest || 0;
         const mid = ((c.bid || 0) + (c.ask || 0)) / 2;
         const premium = volume * mid * 100;
+        totals[putCall] += premium;
+        if (!inWindow) return;
+        const oi = c.openInterest || 0;
         const volOi = oi > 0 ? volume / oi : (volume > 100 ? 10 : 0);
         const isUnusual = (volOi > VOL_OI_THRESHOLD && volume > 500) || (premium > MIN_PREMIUM) || (volume > 5000 && volOi > 1.2);
         if (isUnusual) {
           const last = c.last || mid;
           let side = 'MID';
           if (c.ask && c.bid) {
-            if (Math.abs(last - c.ask) < Math.abs(last - c.bid) * 0.5) side = 'ASK';
-            else if (Math.abs(last - c.bid) < Math.abs(last - c.ask) * 0.5) side = 'BID';
+            const toAsk = Math.abs(last - c.ask);
+            const toBid = Math.abs(last - c.bid);
+            if (toAsk < toBid * 0.5) side = 'ASK';
+            else if (toBid < toAsk * 0.5) side = 'BID';
           }
-          flows.push({ strike: c.strikePrice, stockPrice, side, orderType: volume > 2000 ? 'SWEEP' : volume > 500 ? 'BLOCK' : 'SINGLE', volume, oi, premium: Math.round(premium), putCall, dte, expiration: expKey.split(':')[0], delta: c.delta, iv: c.volatility, bid: c.bid, ask: c.ask });
+          flows.push({ strike: c.strikePrice, stockPrice, side, orderType: volume > 2000 ? 'SWEEP' : volume > 500 ? 'BLOCK' : 'SINGLE', volume, oi, premium: Math.round(premium), putCall, dte, expiration, delta: c.delta, iv: c.volatility, bid: c.bid, ask: c.ask });
         }
       });
     });
   };
   processExpMap(chain.callExpDateMap, 'CALL');
   processExpMap(chain.putExpDateMap, 'PUT');
-  flows.sort((a, b) => b.premium - a.premium);
-  return flows;
+  return { flows, totals };
 }
 
-export async function GET() {
-  try {
-    const opportunities = [];
-    const errors = [];
-    const marketQuotes = {};
-    let vixLevel = null;
-    let vixWarning = null;
+// Largest `count` flows by premium, biggest first — a partial selection
+// instead of sorting every flow when only the top few get scored
+function topFlowsByPremium(flows, count) {
+  const top = [];
+  for (const f of flows) {
+    if (top.length === count && f.premium <= top[count - 1].premium) continue;
+    let i = top.length;
+    while (i > 0 && top[i - 1].premium < f.premium) i--;
+    top.splice(i, 0, f);
+    if (top.length > count) top.pop();
+  }
+  return top;
+}
 
-    // Fetch market benchmarks + VIX
-    try {
-      const quotes = await getQuotes(['SPY', 'QQQ']);
-      if (quotes) {
-        Object.entries(quotes).forEach(([sym, data]) => {
-          const q = data.quote || data;
-          marketQuotes[sym] = { price: q.lastPrice || q.mark || 0, change: Math.round((q.netPercentChangeInDouble || q.netPercentChange || 0) * 100) / 100 };
-        });
-      }
-    } catch (e) { /* non-critical */ }
+// A full scan is ~25 chain fetches — share one in-flight scan between concurrent
+// callers and reuse its result briefly so extra tabs/clients polling inside
+// the same window don't each rerun the whole watchlist
+const SCAN_RESULT_TTL = 15 * 1000; // 15 seconds
+let lastScanResult = null;
+let inFlightScan = null;
+
+async function runScan() {
+  // One clock read per scan — per-ticker timing decisions all use this
+  const scanStart = Date.now();
+  const opportunities = [];
+  const errors = [];
+  const marketQuotes = {};
+  let vixLevel = null;
+  let vixWarning = null;
 
-    // Fetch VIX separately (Finnhub for free VIX quote)
+  // Market benchmarks (Schwab) + VIX (Finnhub, free VIX quote) aren't needed
+  // until the tickers are scored — fetch them together, alongside the scan
+  const benchmarks = Promise.allSettled([getQuotes(['SPY', 'QQQ']), finnhubQuote('VIX')]);
+
+  await mapWithConcurrency(WATCHLIST, SCAN_CONCURRENCY, async (ticker) => {
     try {
-      const vixRes = await fetch(`https://finnhub.io/api/v1/quote?symbol=VIX&token=${process.env.FINNHUB_API_KEY}`);
-      if (vixRes.ok) {
-        const vixData = await vixRes.json();
-        vixLevel = vixData.c || null; // current price
-        marketQuotes.VIX = { price: vixLevel, change: Math.round((vixData.dp || 0) * 100) / 100 };
-      }
-    } catch (e) { /* non-critical */ }
-
-    // VIX Circuit Breaker
-    if (vixLevel) {
-      if (vixLevel >= VIX_HALT) {
-        vixWarning = {
-          level: 'HALT',
-          message: `🚨 VIX at ${vixLevel.toFixed(1)} — EXTREME FEAR. All bullish suggestions paused. Market conditions are too volatile for directional long options. Protect capital.`,
-          color: '#ef4444',
-        };
-      } else if (vixLevel >= VIX_DANGER) {
-        vixWarning = {
-          level: 'DANGER',
-          message: `🔴 VIX at ${vixLevel.toFixed(1)} — HIGH VOLATILITY. Bullish setups are high risk. Premiums are inflated. Consider reducing position size or sitting out.`,
-          color: '#ef4444',
-        };
-      } else if (vixLevel >= VIX_CAUTION) {
-        vixWarning = {
-          level: 'CAUTION',
-          message: `⚠️ VIX at ${vixLevel.toFixed(1)} — ELEVATED. Options premiums are above average. Be selective and favor spreads over naked long options.`,
-          color: '#eab308',
-        };
-      }
-    }
+      const state = stateFor(ticker);
+      const [chain, priceHistory, news, earnings] = await Promise.allSettled([
+        getOptionsChain(ticker),
+        getCachedPriceHistory(ticker, 'year', 2, 'daily', 1),
+        getCachedNews(state, ticker),
+        getCachedEarnings(state, ticker),
+      ]);
+      const chainData = chain.status === 'fulfilled' ? chain.value : null;
+      const historyData = priceHistory.status === 'fulfilled' ? priceHistory.value : null;
+      const newsData = news.status === 'fulfilled' ? news.value : null;
+      const earningsData = earnings.status === 'fulfilled' ? earnings.value : null;
+      if (!chainData) return;
 
-    const batchSize = 5;
-    for (let i = 0; i < WATCHLIST.length; i += batchSize) {
-      const batch = WATCHLIST.slice(i, i + batchSize);
-      await Promise.allSettled(batch.map(async (ticker) => {
-        try {
-          const [chain, priceHistory, news, earnings] = await Promise.allSettled([
-            getOptionsChain(ticker),
-            getCachedPriceHistory(ticker),
-            getNews(ticker, 7),
-            getEarnings(ticker),
-          ]);
-          const chainData = chain.status === 'fulfilled' ? chain.value : null;
-          const historyData = priceHistory.status === 'fulfilled' ? priceHistory.value : null;
-          const newsData = news.status === 'fulfilled' ? news.value : null;
-          const earningsData = earnings.status === 'fulfilled' ? earnings.value : null;
-          if (!chainData) return;
-
-          const stockPrice = chainData.underlyingPrice || chainData.underlying?.last || chainData.underlying?.mark || 0;
-          if (stockPrice === 0) return;
-
-          calculateNetFlow(ticker, chainData);
-          const closePrices = historyData?.candles ? historyData.candles.map(c => c.close) : [];
-          const volumes = historyData?.candles ? historyData.candles.map(c => c.volume) : [];
-          const flows = detectUnusualFlow(chainData, stockPrice);
-          prevScanCache[ticker] = { timestamp: Date.now() };
-
-          for (const flowData of flows.slice(0, 3)) {
-            const card = scoreOpportunity({ flowData, chainData, closePrices, earningsData, newsData, ticker, stockPrice, volumes });
-            if (!card) continue;
-
-            const prevClose = closePrices.length >= 2 ? closePrices[closePrices.length - 2] : stockPrice;
-            card.change = Math.round(((stockPrice - prevClose) / prevClose) * 1000) / 10;
-
-            // Deduplicate: only keep the best card per ticker
-            const existingIdx = opportunities.findIndex(o => o.ticker === ticker);
-            if (existingIdx >= 0) {
-              // Replace only if this card has higher confidence or same confidence + bigger premium
-              const existing = opportunities[existingIdx];
-              if (card.confidence > existing.confidence ||
-                 (card.confidence === existing.confidence && (card.layers.flow.premium || 0) > (existing.layers.flow.premium || 0))) {
-                opportunities[existingIdx] = card;
-              }
-              continue; // skip adding a duplicate
-            }
-
-            // Layer 6: Insider/Congressional (once per day per ticker)
-            const now = Date.now();
-            if (now - (lastInsiderCheck[ticker] || 0) > 24 * 60 * 60 * 1000) {
-              try {
-                const insiderData = await getInsiderActivity(ticker, card.direction);
-                card.insiderActivity = insiderData;
-                if (insiderData.confirmed && insiderData.description) card.thesis += ' ' + insiderData.description;
-                else if (insiderData.conflictWarning && insiderData.description) card.thesis += ' ' + insiderData.description;
-                lastInsiderCheck[ticker] = now;
-              } catch { /* non-critical */ }
-            }
-
-            // Market flow context
-            const mf = getMarketFlow();
-            card.marketFlow = { sentiment: mf.sentiment, netPremium: mf.netPremium, aligned: mf.aligned(card.direction), description: mf.description(card.direction) };
-            if (mf.sentiment !== 'NEUTRAL') card.thesis += ' ' + mf.description(card.direction);
-
-            opportunities.push(card);
-          }
+      const stockPrice = chainData.underlyingPrice || chainData.underlying?.last || chainData.underlying?.mark || 0;
+      if (stockPrice === 0) return;
 
-          // Update tracked trades for this ticker
-          const tracked = getTrackedTrades().filter(t => t.ticker === ticker && t.status !== 'EXPIRED');
-          for (const trade of tracked) {
-            const leg = trade.legs[0];
-            if (!leg) continue;
-            const expMap = leg.type === 'CALL' ? chainData.callExpDateMap : chainData.putExpDateMap;
-            if (!expMap) continue;
-            let currentOI = 0, currentPrice = 0;
-            Object.entries(expMap).forEach(([expKey, contracts]) => {
-              if (!expKey.startsWith(leg.expiration) || !Array.isArray(contracts)) return;
-              const match = contracts.find(c => c.strikePrice === leg.strike);
-              if (match) { currentOI = match.openInterest || 0; currentPrice = ((match.bid || 0) + (match.ask || 0)) / 2; }
-            });
-            const oppositeFlows = flows.filter(f => trade.direction === 'BULLISH' ? f.putCall === 'PUT' && f.side === 'ASK' : f.putCall === 'CALL' && f.side === 'ASK');
-            updateTrackedTrade(trade.id, currentOI, currentPrice, oppositeFlows.some(f => f.premium > 500000));
+      const { closes: closePrices, volumes } = candleSeries(historyData?.candles);
+      const { flows, totals } = detectUnusualFlow(chainData, stockPrice);
+      recordNetFlow(ticker, totals.CALL, totals.PUT);
+
+      // Indicators depend only on the ticker's history — compute once for all its flows
+      const technicals = analyzeTechnicals(closePrices);
+      const emaProximity = calculateEma200Proximity(closePrices, volumes, stockPrice);
+
+      // Slot of this ticker's card in opportunities — cards never span tickers,
+      // so dedup needs no search across the other tickers' results
+      let cardIdx = -1;
+      for (const flowData of topFlowsByPremium(flows, FLOWS_PER_TICKER)) {
+        const card = scoreOpportunity({ flowData, chainData, closePrices, earningsData, newsData, ticker, stockPrice, volumes, technicals, emaProximity });
+        if (!card) continue;
+
+        const prevClose = closePrices.length >= 2 ? closePrices[closePrices.length - 2] : stockPrice;
+        card.change = Math.round(((stockPrice - prevClose) / prevClose) * 1000) / 10;
+
+        // Deduplicate: only keep the best card per ticker
+        if (cardIdx >= 0) {
+          // Replace only if this card has higher confidence or same confidence + bigger premium
+          const existing = opportunities[cardIdx];
+          if (card.confidence > existing.confidence ||
+             (card.confidence === existing.confidence && (card.layers.flow.premium || 0) > (existing.layers.flow.premium || 0))) {
+            opportunities[cardIdx] = card;
           }
-        } catch (err) { errors.push({ ticker, error: err.message }); }
-      }));
-      if (i + batchSize < WATCHLIST.length) await new Promise(r => setTimeout(r, 500));
-    }
+          continue; // skip adding a duplicate
+        }
 
-    cleanupExpiredTrades();
-
-    // Apply VIX circuit breaker — filter bullish cards in extreme conditions
-    let filteredOpps = opportunities;
-    if (vixWarning?.level === 'HALT') {
-      filteredOpps = opportunities.filter(o => o.direction !== 'BULLISH');
-    } else if (vixWarning) {
-      // Add VIX warning to every bullish card's thesis
-      filteredOpps = opportunities.map(o => {
-        if (o.direction === 'BULLISH') {
-          return { ...o, vixWarning, thesis: o.thesis + ` ${vixWarning.message}` };
+        // Layer 6: Insider/Congressional (once per day per ticker)
+        if (scanStart - (state.insiderCheckedAt || 0) > 24 * 60 * 60 * 1000) {
+          try {
+            const insiderData = await getInsiderActivity(ticker, card.direction);
+            card.insiderActivity = insiderData;
+            if (insiderData.confirmed && insiderData.description) card.thesis += ' ' + insiderData.description;
+            else if (insiderData.conflictWarning && insiderData.description) card.thesis += ' ' + insiderData.description;
+            state.insiderCheckedAt = scanStart;
+          } catch { /* non-critical */ }
         }
-        return o;
+
+        // Market flow context — read after the insider await, since other
+        // tickers keep recording flow while it is pending
+        const mf = getMarketFlow();
+        const flowNote = mf.description(card.direction);
+        card.marketFlow = { sentiment: mf.sentiment, netPremium: mf.netPremium, aligned: mf.aligned(card.direction), description: flowNote };
+        if (mf.sentiment !== 'NEUTRAL') card.thesis += ' ' + flowNote;
+
+        cardIdx = opportunities.push(card) - 1;
+      }
+
+      // Update tracked trades for this ticker. Large opposing sweeps depend only
+      // on the trade's direction, so check the flows once per side, not per trade.
+      let conflictsWith = null;
+      for (const trade of iterActiveTrades(ticker)) {
+        const leg = trade.legs[0];
+        if (!leg) continue;
+        const expMap = chainData[EXP_DATE_MAP_KEY[leg.type]];
+        if (!expMap) continue;
+        let currentOI = 0, currentPrice = 0;
+        Object.entries(expMap).forEach(([expKey, contracts]) => {
+          if (!expKey.startsWith(leg.expiration) || !Array.isArray(contracts)) return;
+          const match = contracts.find(c => c.strikePrice === leg.strike);
+          if (match) { currentOI = match.openInterest || 0; currentPrice = ((match.bid || 0) + (match.ask || 0)) / 2; }
+        });
+        if (!conflictsWith) {
+          conflictsWith = { CALL: false, PUT: false };
+          for (const f of flows) if (f.side === 'ASK' && f.premium > 500000) conflictsWith[f.putCall] = true;
+        }
+        const conflictingFlow = conflictsWith[trade.direction === 'BULLISH' ? 'PUT' : 'CALL'];
+        updateTrackedTrade(trade.id, currentOI, currentPrice, conflictingFlow);
+      }
+    } catch (err) { errors.push({ ticker, error: err.message }); }
+  });
+
+  const [quotesResult, vixResult] = await benchmarks;
+  try {
+    const quotes = quotesResult.status === 'fulfilled' ? quotesResult.value : null;
+    if (quotes) {
+      Object.entries(quotes).forEach(([sym, data]) => {
+        const q = data.quote || data;
+        marketQuotes[sym] = { price: q.lastPrice || q.mark || 0, change: Math.round((q.netPercentChangeInDouble || q.netPercentChange || 0) * 100) / 100 };
       });
     }
+  } catch (e) { /* non-critical */ }
+
+  const vixData = vixResult.status === 'fulfilled' ? vixResult.value : null;
+  if (vixData) {
+    vixLevel = vixData.c || null; // current price
+    marketQuotes.VIX = { price: vixLevel, change: Math.round((vixData.dp || 0) * 100) / 100 };
+  }
+
+  // VIX Circuit Breaker
+  if (vixLevel) {
+    if (vixLevel >= VIX_HALT) {
+      vixWarning = {
+        level: 'HALT',
+        message: `🚨 VIX at ${vixLevel.toFixed(1)} — EXTREME FEAR. All bullish suggestions paused. Market conditions are too volatile for directional long options. Protect capital.`,
+        color: '#ef4444',
+      };
+    } else if (vixLevel >= VIX_DANGER) {
+      vixWarning = {
+        level: 'DANGER',
+        message: `🔴 VIX at ${vixLevel.toFixed(1)} — HIGH VOLATILITY. Bullish setups are high risk. Premiums are inflated. Consider reducing position size or sitting out.`,
+        color: '#ef4444',
+      };
+    } else if (vixLevel >= VIX_CAUTION) {
+      vixWarning = {
+        level: 'CAUTION',
+        message: `⚠️ VIX at ${vixLevel.toFixed(1)} — ELEVATED. Options premiums are above average. Be selective and favor spreads over naked long options.`,
+        color: '#eab308',
+      };
+    }
+  }
+
+  cleanupExpiredTrades();
+  savePriceHistorySnapshot();
 
-    filteredOpps.sort((a, b) => {
-      if (a.insiderActivity?.confirmed && !b.insiderActivity?.confirmed) return -1;
-      if (!a.insiderActivity?.confirmed && b.insiderActivity?.confirmed) return 1;
-      if (b.confidence !== a.confidence) return b.confidence - a.confidence;
-      return new Date(b.timestamp) - new Date(a.timestamp);
+  // Apply VIX circuit breaker — filter bullish cards in extreme conditions
+  let filteredOpps = opportunities;
+  if (vixWarning?.level === 'HALT') {
+    filteredOpps = opportunities.filter(o => o.direction !== 'BULLISH');
+  } else if (vixWarning) {
+    // Add VIX warning to every bullish card's thesis
+    filteredOpps = opportunities.map(o => {
+      if (o.direction === 'BULLISH') {
+        return { ...o, vixWarning, thesis: o.thesis + ` ${vixWarning.message}` };
+      }
+      return o;
     });
+  }
+
+  // Compute rank keys once per card, then sort on plain numbers
+  // (insider-confirmed first, then confidence, then newest)
+  filteredOpps = filteredOpps
+    .map(o => ({ o, insider: o.insiderActivity?.confirmed ? 1 : 0, ts: Date.parse(o.timestamp) }))
+    .sort((a, b) => (b.insider - a.insider) || (b.o.confidence - a.o.confidence) || (b.ts - a.ts))
+    .map(r => r.o);
+
+  const mf = getMarketFlow();
+
+  // Detect market status for freshness indicator
+  const now = new Date();
+  const et = new Date(now.toLocaleString('en-US', { timeZone: 'America/New_York' }));
+  const hour = et.getHours();
+  const minute = et.getMinutes();
+  const day = et.getDay(); // 0=Sun, 6=Sat
+  const isWeekend = day === 0 || day === 6;
+  const timeInMinutes = hour * 60 + minute;
+  const preMarket = timeInMinutes >= 4 * 60 && timeInMinutes < 9 * 60 + 30;
+  const marketOpen = timeInMinutes >= 9 * 60 + 30 && timeInMinutes < 16 * 60;
+  const afterHours = timeInMinutes >= 16 * 60 && timeInMinutes < 20 * 60;
+
+  let marketStatus = 'CLOSED';
+  if (isWeekend) marketStatus = 'WEEKEND';
+  else if (marketOpen) marketStatus = 'OPEN';
+  else if (preMarket) marketStatus = 'PRE_MARKET';
+  else if (afterHours) marketStatus = 'AFTER_HOURS';
+
+  // Data freshness note
+  let freshnessNote = '';
+  if (marketStatus === 'OPEN') {
+    freshnessNote = 'Live data — chain and quotes are real-time from Schwab.';
+  } else if (marketStatus === 'PRE_MARKET') {
+    freshnessNote = 'Pre-market — chain data reflects yesterday\'s close. Quotes may update.';
+  } else if (marketStatus === 'AFTER_HOURS') {
+    freshnessNote = 'After hours — chain data reflects today\'s close. OI updates overnight.';
+  } else {
+    freshnessNote = 'Market closed — data reflects last trading session. OI may have updated overnight.';
+  }
+
+  return {
+    opportunities: filteredOpps,
+    marketFlow: { sentiment: mf.sentiment, netPremium: mf.formatted, bullish: mf.netPremium > 0 },
+    marketQuotes,
+    vixWarning,
+    vixLevel,
+    marketStatus,
+    freshnessNote,
+    scannedAt: new Date().toISOString(),
+    tickersScanned: WATCHLIST.length,
+    errors: errors.length > 0 ? errors : undefined,
+  };
+}
 
-    const mf = getMarketFlow();
-
-    // Detect market status for freshness indicator
-    const now = new Date();
-    const et = new Date(now.toLocaleString('en-US', { timeZone: 'America/New_York' }));
-    const hour = et.getHours();
-    const minute = et.getMinutes();
-    const day = et.getDay(); // 0=Sun, 6=Sat
-    const isWeekend = day === 0 || day === 6;
-    const timeInMinutes = hour * 60 + minute;
-    const preMarket = timeInMinutes >= 4 * 60 && timeInMinutes < 9 * 60 + 30;
-    const marketOpen = timeInMinutes >= 9 * 60 + 30 && timeInMinutes < 16 * 60;
-    const afterHours = timeInMinutes >= 16 * 60 && timeInMinutes < 20 * 60;
-
-    let marketStatus = 'CLOSED';
-    if (isWeekend) marketStatus = 'WEEKEND';
-    else if (marketOpen) marketStatus = 'OPEN';
-    else if (preMarket) marketStatus = 'PRE_MARKET';
-    else if (afterHours) marketStatus = 'AFTER_HOURS';
-
-    // Data freshness note
-    let freshnessNote = '';
-    if (marketStatus === 'OPEN') {
-      freshnessNote = 'Live data — chain and quotes are real-time from Schwab.';
-    } else if (marketStatus === 'PRE_MARKET') {
-      freshnessNote = 'Pre-market — chain data reflects yesterday\'s close. Quotes may update.';
-    } else if (marketStatus === 'AFTER_HOURS') {
-      freshnessNote = 'After hours — chain data reflects today\'s close. OI updates overnight.';
-    } else {
-      freshnessNote = 'Market closed — data reflects last trading session. OI may have updated overnight.';
+export async function GET() {
+  try {
+    if (!lastScanResult || Date.now() - lastScanResult.timestamp >= SCAN_RESULT_TTL) {
+      if (!inFlightScan) {
+        inFlightScan = runScan()
+          .then(payload => { lastScanResult = { payload, timestamp: Date.now() }; return payload; })
+          .finally(() => { inFlightScan = null; });
+      }
+      await inFlightScan;
     }
 
     const response = NextResponse.json({
-      opportunities: filteredOpps,
+      ...lastScanResult.payload,
+      // Tracked trades can change between scans (activate/deactivate) — always read live
       trackedTrades: getTrackedTrades().filter(t => t.status !== 'EXPIRED'),
-      marketFlow: { sentiment: mf.sentiment, netPremium: mf.formatted, bullish: mf.netPremium > 0 },
-      marketQuotes,
-      vixWarning,
-      vixLevel,
-      marketStatus,
-      freshnessNote,
-      scannedAt: new Date().toISOString(),
-      tickersScanned: WATCHLIST.length,
-      errors: errors.length > 0 ? errors : undefined,
     });
 
     // Prevent any caching
@@ -7,8 +7,8 @@ import { NextResponse } from 'next/server';
 // Force dynamic rendering
 export const dynamic = 'force-dynamic';
 export const revalidate = 0;
-import { getOptionsChain, getPriceHistory } from '@/lib/schwab';
-import { getEarnings, getNews } from '@/lib/finnhub';
+import { getOptionsChain } from '@/lib/schwab';
+import { getEarnings } from '@/lib/finnhub';
 
 function analyzeChain(chainData, stockPrice) {
   const results = {
@@ -25,6 +25,7 @@ function analyzeChain(chainData, stockPrice) {
   let callAskVol = 0, callBidVol = 0;
   let putAskVol = 0, putBidVol = 0;
   let totalCallPremium = 0, totalPutPremium = 0;
+  let unusualCallCount = 0, unusualPutCount = 0;
 
   const processMap = (expMap, putCall) => {
     if (!expMap) return;
@@ -32,13 +33,15 @@ function analyzeChain(chainData, stockPrice) {
 
     Object.entries(expMap).forEach(([expKey, contracts]) => {
       if (!Array.isArray(contracts)) return;
-      const dte = parseInt(expKey.split(':')[1]) || 0;
-      const expDate = expKey.split(':')[0];
+      const [expDate, dteStr] = expKey.split(':');
+      const dte = parseInt(dteStr) || 0;
 
       contracts.forEach(c => {
+        // Read each contract field once into locals
+        const { bid, ask, strikePrice: strike, delta, gamma, theta, volatility } = c;
         const vol = c.totalVolume || 0;
         const oi = c.openInterest || 0;
-        const mid = ((c.bid || 0) + (c.ask || 0)) / 2;
+        const mid = ((bid || 0) + (ask || 0)) / 2;
         const premium = vol * mid * 100;
         const volOi = oi > 0 ? vol / oi : 0;
         const last = c.last || mid;
@@ -57,9 +60,9 @@ function analyzeChain(chainData, stockPrice) {
         // Determine aggressor side
         let side = 'MID';
         let sideConfidence = 'LOW';
-        if (c.bid && c.ask && c.ask > c.bid) {
-          const range = c.ask - c.bid;
-          const lastPos = (last - c.bid) / range; // 0 = at bid, 1 = at ask
+        if (bid && ask && ask > bid) {
+          const range = ask - bid;
+          const lastPos = (last - bid) / range; // 0 = at bid, 1 = at ask
           if (lastPos > 0.7) { side = 'ASK'; sideConfidence = lastPos > 0.85 ? 'HIGH' : 'MEDIUM'; }
           else if (lastPos < 0.3) { side = 'BID'; sideConfidence = lastPos < 0.15 ? 'HIGH' : 'MEDIUM'; }
         }
@@ -74,8 +77,8 @@ function analyzeChain(chainData, stockPrice) {
         }
 
         // Classify the activity
-        const pctFromSpot = ((c.strikePrice - stockPrice) / stockPrice) * 100;
-        const isITM = putCall === 'CALL' ? c.strikePrice < stockPrice : c.strikePrice > stockPrice;
+        const pctFromSpot = ((strike - stockPrice) / stockPrice) * 100;
+        const isITM = putCall === 'CALL' ? strike < stockPrice : strike > stockPrice;
         const isATM = Math.abs(pctFromSpot) < 3;
         const moneyness = isATM ? 'ATM' : isITM ? 'ITM' : 'OTM';
 
@@ -126,15 +129,16 @@ function analyzeChain(chainData, stockPrice) {
 
         // Only include strikes with meaningful activity
         if (vol >= 50 || premium > 50000) {
+          const isUnusual = volOi > 1.5 || premium > 250000 || vol > 5000;
           const entry = {
-            strike: c.strikePrice,
+            strike,
             expiration: expDate,
             dte,
             putCall,
             moneyness,
             pctFromSpot: Math.round(pctFromSpot * 10) / 10,
-            bid: c.bid,
-            ask: c.ask,
+            bid,
+            ask,
             last: c.last,
             mid: Math.round(mid * 100) / 100,
             volume: vol,
@@ -143,21 +147,27 @@ function analyzeChain(chainData, stockPrice) {
             premium: Math.round(premium),
             side,
             sideConfidence,
-            delta: c.delta ? Math.round(c.delta * 1000) / 1000 : null,
-            gamma: c.gamma ? Math.round(c.gamma * 10000) / 10000 : null,
-            theta: c.theta ? Math.round(c.theta * 1000) / 1000 : null,
-            iv: c.volatility ? Math.round(c.volatility * 10) / 10 : null,
+            delta: delta ? Math.round(delta * 1000) / 1000 : null,
+            gamma: gamma ? Math.round(gamma * 10000) / 10000 : null,
+            theta: theta ? Math.round(theta * 1000) / 1000 : null,
+            iv: volatility ? Math.round(volatility * 10) / 10 : null,
             buyerIntent,
             sellerIntent,
             oiSignal,
-            isUnusual: volOi > 1.5 || premium > 250000 || vol > 5000,
+            isUnusual,
           };
 
-          if (putCall === 'CALL') results.calls.push(entry);
-          else results.puts.push(entry);
+          // Count unusual entries as they're kept — no second pass in the summary
+          if (putCall === 'CALL') {
+            results.calls.push(entry);
+            if (isUnusual) unusualCallCount++;
+          } else {
+            results.puts.push(entry);
+            if (isUnusual) unusualPutCount++;
+          }
 
-          // Collect for spread detection
-          strikes.push({ ...entry, expKey });
+          // Collect for spread detection (read-only there, so share the entry)
+          strikes.push(entry);
         }
       });
     });
@@ -174,9 +184,9 @@ function analyzeChain(chainData, stockPrice) {
     if (!strikes || strikes.length < 2) return;
     const byExp = {};
     strikes.forEach(s => {
-      const key = s.expiration;
-      if (!byExp[key]) byExp[key] = [];
-      byExp[key].push(s);
+      const group = byExp[s.expiration];
+      if (group) group.push(s);
+      else byExp[s.expiration] = [s];
     });
 
     Object.entries(byExp).forEach(([exp, stks]) => {
@@ -275,8 +285,8 @@ function analyzeChain(chainData, stockPrice) {
     putAskPct: putBearPct,
     putBidPct: totalPutVol > 0 ? Math.round((putBidVol / totalPutVol) * 100) : 0,
     sentiment,
-    unusualCallCount: results.calls.filter(c => c.isUnusual).length,
-    unusualPutCount: results.puts.filter(p => p.isUnusual).length,
+    unusualCallCount,
+    unusualPutCount,
     detectedSpreads: results.spreads.length,
   };
 
@@ -288,11 +298,9 @@ export async function GET(request) {
   const ticker = (searchParams.get('ticker') || 'SPY').toUpperCase();
 
   try {
-    const [chain, history, earnings, news] = await Promise.allSettled([
+    const [chain, earnings] = await Promise.allSettled([
       getOptionsChain(ticker),
-      getPriceHistory(ticker, 'year', 2, 'daily', 1),
       getEarnings(ticker),
-      getNews(ticker, 7),
     ]);
 
     const chainData = chain.status === 'fulfilled' ? chain.value : null;
@@ -305,12 +313,13 @@ export async function GET(request) {
     let earningsInfo = null;
     const earningsData = earnings.status === 'fulfilled' ? earnings.value : null;
     if (earningsData?.earningsCalendar) {
+      const now = Date.now();
       const upcoming = earningsData.earningsCalendar.find(e => {
         if (e.symbol !== ticker) return false;
-        const days = Math.ceil((new Date(e.date) - Date.now()) / (1000 * 60 * 60 * 24));
+        const days = Math.ceil((new Date(e.date) - now) / (1000 * 60 * 60 * 24));
         return days > 0 && days <= 30;
       });
-      if (upcoming) earningsInfo = { date: upcoming.date, daysUntil: Math.ceil((new Date(upcoming.date) - Date.now()) / (1000 * 60 * 60 * 24)) };
+      if (upcoming) earningsInfo = { date: upcoming.date, daysUntil: Math.ceil((new Date(upcoming.date) - now) / (1000 * 60 * 60 * 24)) };
     }
 
     return NextResponse.json({
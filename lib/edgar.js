@@ -2,7 +2,6 @@
 // SEC EDGAR + Congressional trading data
 // All free, public data — no API keys needed (just a user-agent identity)
 
-const EDGAR_BASE = 'https://efts.sec.gov/LATEST';
 const EDGAR_DATA = 'https://data.sec.gov';
 const IDENTITY = process.env.EDGAR_IDENTITY || 'FlowHunter app@flowhunter.dev';
 
@@ -11,37 +10,36 @@ const HEADERS = {
   'Accept': 'application/json',
 };
 
-// Ticker → CIK mapping cache
-let cikCache = {};
+// Ticker → CIK index, built once from SEC's company_tickers.json (covers every
+// listed company) and shared by all lookups. Holds the in-flight promise so
+// concurrent lookups share one download.
+let cikIndexPromise = null;
+
+function loadCikIndex() {
+  if (!cikIndexPromise) {
+    cikIndexPromise = (async () => {
+      const res = await fetch('https://www.sec.gov/files/company_tickers.json', {
+        headers: HEADERS,
+      });
+      if (!res.ok) throw new Error(`company_tickers.json returned ${res.status}`);
+      const index = new Map();
+      Object.values(await res.json()).forEach(t => {
+        const key = t.ticker?.toUpperCase();
+        if (key && !index.has(key)) index.set(key, String(t.cik_str).padStart(10, '0'));
+      });
+      return index;
+    })();
+    // Don't pin a failed download — the next lookup retries
+    cikIndexPromise.catch(() => { cikIndexPromise = null; });
+  }
+  return cikIndexPromise;
+}
 
 // ── Get CIK for a ticker ──
 async function getCIK(ticker) {
-  if (cikCache[ticker]) return cikCache[ticker];
-
   try {
-    const res = await fetch(`${EDGAR_BASE}/search-index?q=${ticker}&dateRange=custom&startdt=2024-01-01&forms=4`, {
-      headers: HEADERS,
-    });
-    if (!res.ok) return null;
-    const data = await res.json();
-
-    // Try company tickers endpoint instead (more reliable)
-    const tickerRes = await fetch('https://www.sec.gov/files/company_tickers.json', {
-      headers: HEADERS,
-    });
-    if (tickerRes.ok) {
-      const tickers = await tickerRes.json();
-      const entry = Object.values(tickers).find(
-        t => t.ticker?.toUpperCase() === ticker.toUpperCase()
-      );
-      if (entry) {
-        const cik = String(entry.cik_str).padStart(10, '0');
-        cikCache[ticker] = cik;
-        return cik;
-      }
-    }
-
-    return null;
+    const index = await loadCikIndex();
+    return index.get(ticker.toUpperCase()) || null;
   } catch (err) {
     console.error(`EDGAR CIK lookup failed for ${ticker}:`, err.message);
     return null;
@@ -65,7 +63,8 @@ export async function getInsiderTrades(ticker, daysBack = 90) {
     const recent = data.filings?.recent;
     if (!recent) return [];
 
-    const cutoff = new Date(Date.now() - daysBack * 24 * 60 * 60 * 1000);
+    const now = Date.now();
+    const cutoff = new Date(now - daysBack * 24 * 60 * 60 * 1000);
     const trades = [];
 
     for (let i = 0; i < (recent.form?.length || 0); i++) {
@@ -80,7 +79,7 @@ export async function getInsiderTrades(ticker, daysBack = 90) {
         title: '',
         action: 'FILED', // Form 4 = insider transaction
         date: recent.filingDate[i],
-        daysAgo: Math.ceil((Date.now() - filingDate.getTime()) / (1000 * 60 * 60 * 24)),
+        daysAgo: Math.ceil((now - filingDate.getTime()) / (1000 * 60 * 60 * 24)),
         accessionNumber: recent.accessionNumber[i],
         url: `https://www.sec.gov/Archives/edgar/data/${cik.replace(/^0+/, '')}/${recent.accessionNumber[i].replace(/-/g, '')}`,
       });
@@ -118,7 +117,8 @@ export async function getCongressTrades(ticker, daysBack = 90) {
     const data = await res.json();
     if (!Array.isArray(data)) return [];
 
-    const cutoff = new Date(Date.now() - daysBack * 24 * 60 * 60 * 1000);
+    const now = Date.now();
+    const cutoff = new Date(now - daysBack * 24 * 60 * 60 * 1000);
 
     return data
       .filter(t => new Date(t.Date || t.TransactionDate) > cutoff)
@@ -129,7 +129,7 @@ export async function getCongressTrades(ticker, daysBack = 90) {
         action: (t.Transaction || '').toLowerCase().includes('purchase') ? 'BUY' : 'SELL',
         amount: t.Range || t.Amount || 'Unknown',
         date: t.Date || t.TransactionDate,
-        daysAgo: Math.ceil((Date.now() - new Date(t.Date || t.TransactionDate).getTime()) / (1000 * 60 * 60 * 24)),
+        daysAgo: Math.ceil((now - new Date(t.Date || t.TransactionDate).getTime()) / (1000 * 60 * 60 * 24)),
       }))
       .slice(0, 10);
   } catch (err) {
@@ -152,7 +152,8 @@ async function getCongressTradesFallback(ticker, daysBack) {
     const data = await res.json();
     if (!data.data || !Array.isArray(data.data)) return [];
 
-    const cutoff = new Date(Date.now() - daysBack * 24 * 60 * 60 * 1000);
+    const now = Date.now();
+    const cutoff = new Date(now - daysBack * 24 * 60 * 60 * 1000);
 
     return data.data
       .filter(t => new Date(t.txDate) > cutoff)
@@ -163,7 +164,7 @@ async function getCongressTradesFallback(ticker, daysBack) {
         action: t.txType === 'purchase' ? 'BUY' : 'SELL',
         amount: t.amount || 'Unknown',
         date: t.txDate,
-        daysAgo: Math.ceil((Date.now() - new Date(t.txDate).getTime()) / (1000 * 60 * 60 * 24)),
+        daysAgo: Math.ceil((now - new Date(t.txDate).getTime()) / (1000 * 60 * 60 * 24)),
       }))
       .slice(0, 10);
   } catch {
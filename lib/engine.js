@@ -2,13 +2,20 @@
 // FlowHunter 5-Layer Institutional Scoring Engine
 // Each layer scores 0 or 1. Minimum 4/5 to surface a card.
 
-import { MIN_DTE, MAX_DTE, MIN_OI, MAX_SPREAD_PCT, VOL_OI_THRESHOLD, MIN_PREMIUM } from './watchlist.js';
+import { MIN_DTE, MAX_DTE, MIN_OI, MAX_SPREAD_PCT, VOL_OI_THRESHOLD, MIN_PREMIUM, EXP_DATE_MAP_KEY } from './watchlist.js';
 import { analyzeTechnicals, scoreTechnicals, realizedVol, calculateEma200Proximity } from './technicals.js';
 
 // ============================================================
 // LAYER 1: Flow Intent Analysis
 // Question: Is this speculative conviction or just hedging?
 // ============================================================
+
+// Direction implied by contract type × aggressor side
+const FLOW_DIRECTION = Object.freeze({
+  CALL: Object.freeze({ ASK: 'BULLISH', BID: 'BEARISH', MID: 'BEARISH' }), // bought / sold calls
+  PUT: Object.freeze({ ASK: 'BEARISH', BID: 'BULLISH', MID: 'AMBIGUOUS' }), // bought / sold puts
+});
+
 export function scoreFlowIntent(flowData) {
   // flowData: { strike, stockPrice, side, orderType, volume, oi, premium, putCall, dte }
   const { strike, stockPrice, side, volume, oi, premium, putCall, dte } = flowData;
@@ -20,15 +27,7 @@ export function scoreFlowIntent(flowData) {
   const isFarOTM = pctFromSpot > 0.10;
 
   let intent = 'AMBIGUOUS';
-  let direction = putCall === 'CALL'
-    ? (side === 'ASK' ? 'BULLISH' : 'BEARISH')
-    : (side === 'BID' || side === 'ASK' ? (putCall === 'PUT' ? 'BEARISH' : 'BULLISH') : 'AMBIGUOUS');
-
-  // Refined direction logic
-  if (putCall === 'CALL' && side === 'ASK') direction = 'BULLISH';
-  if (putCall === 'CALL' && side === 'BID') direction = 'BEARISH'; // selling calls
-  if (putCall === 'PUT' && side === 'ASK') direction = 'BEARISH'; // buying puts
-  if (putCall === 'PUT' && side === 'BID') direction = 'BULLISH'; // selling puts
+  const direction = FLOW_DIRECTION[putCall]?.[side] || 'AMBIGUOUS';
 
   // Speculative indicators
   let specScore = 0;
@@ -83,9 +82,13 @@ export function scoreFlowIntent(flowData) {
 // LAYER 2: Dealer Positioning (Gamma Exposure)
 // Question: Are market makers positioned to help or hurt this trade?
 // ============================================================
-export function scoreGammaExposure(chainData, stockPrice, direction) {
-  // chainData: full options chain with all strikes, calls/puts, gamma, OI
-  if (!chainData) return { score: 0, description: 'Chain data unavailable' };
+// Dealer gamma profile of a chain — independent of trade direction, so it is
+// walked once per chain snapshot and shared by every flow scored against it
+const gammaProfiles = new WeakMap();
+
+function gammaProfile(chainData, stockPrice) {
+  const cached = gammaProfiles.get(chainData);
+  if (cached && cached.stockPrice === stockPrice) return cached;
 
   let totalCallGex = 0;
   let totalPutGex = 0;
@@ -117,6 +120,17 @@ export function scoreGammaExposure(chainData, stockPrice, direction) {
   processMap(chainData.callExpDateMap, 'call');
   processMap(chainData.putExpDateMap, 'put');
 
+  const profile = { stockPrice, totalCallGex, totalPutGex, maxCallGexStrike, maxPutGexStrike };
+  gammaProfiles.set(chainData, profile);
+  return profile;
+}
+
+export function scoreGammaExposure(chainData, stockPrice, direction) {
+  // chainData: full options chain with all strikes, calls/puts, gamma, OI
+  if (!chainData) return { score: 0, description: 'Chain data unavailable' };
+
+  const { totalCallGex, totalPutGex, maxCallGexStrike, maxPutGexStrike } = gammaProfile(chainData, stockPrice);
+
   const netGex = totalCallGex - totalPutGex;
   const regime = netGex > 0 ? 'POSITIVE' : 'NEGATIVE';
   const callWall = maxCallGexStrike || stockPrice * 1.05;
@@ -179,9 +193,10 @@ export function scoreVolatility(chainData, closePrices, direction) {
   if (chainData.callExpDateMap) {
     const firstExp = Object.values(chainData.callExpDateMap)[0];
     if (firstExp && Array.isArray(firstExp)) {
+      const lastClose = closePrices[closePrices.length - 1];
       const atmCall = firstExp.reduce((closest, c) =>
-        Math.abs(c.strikePrice - closePrices[closePrices.length - 1]) <
-        Math.abs(closest.strikePrice - closePrices[closePrices.length - 1]) ? c : closest
+        Math.abs(c.strikePrice - lastClose) <
+        Math.abs(closest.strikePrice - lastClose) ? c : closest
       , firstExp[0]);
       const putMap = chainData.putExpDateMap;
       const firstPutExp = putMap ? Object.values(putMap)[0] : null;
@@ -234,6 +249,7 @@ export function scoreCatalyst(earningsData, newsData, ticker) {
   let daysUntil = null;
   let description = 'No significant catalyst within 14 days.';
   let score = 0;
+  const now = Date.now(); // one clock read for every date comparison below
 
   // Check earnings
   if (earningsData?.earningsCalendar) {
@@ -241,14 +257,14 @@ export function scoreCatalyst(earningsData, newsData, ticker) {
       .filter(e => e.symbol === ticker)
       .find(e => {
         const d = new Date(e.date);
-        const days = Math.ceil((d - Date.now()) / (1000 * 60 * 60 * 24));
+        const days = Math.ceil((d - now) / (1000 * 60 * 60 * 24));
         return days > 0 && days <= 30;
       });
 
     if (upcoming) {
       catalystType = 'EARNINGS';
       catalystDate = upcoming.date;
-      daysUntil = Math.ceil((new Date(upcoming.date) - Date.now()) / (1000 * 60 * 60 * 24));
+      daysUntil = Math.ceil((new Date(upcoming.date) - now) / (1000 * 60 * 60 * 24));
       score = daysUntil <= 14 ? 1 : 0;
       description = `Earnings in ${daysUntil} days (${upcoming.date}). ${score ? 'Flow is building ahead of the report — institutions are positioning early.' : 'Earnings approaching but still 2+ weeks out.'}`;
     }
@@ -257,7 +273,7 @@ export function scoreCatalyst(earningsData, newsData, ticker) {
   // Check news (if no earnings catalyst found)
   if (score === 0 && newsData && Array.isArray(newsData) && newsData.length > 0) {
     const recentImpactful = newsData.filter(n => {
-      const ageHours = (Date.now() - n.datetime * 1000) / (1000 * 60 * 60);
+      const ageHours = (now - n.datetime * 1000) / (1000 * 60 * 60);
       return ageHours < 48; // last 48 hours
     });
 
@@ -308,9 +324,8 @@ export function selectStrategy(direction, ivRank, catalystDaysUntil, stockPrice,
   }
 
   // Find best expiration near targetDTE
-  const expMap = direction === 'BULLISH'
-    ? chainData?.callExpDateMap
-    : chainData?.putExpDateMap;
+  const legType = direction === 'BULLISH' ? 'CALL' : 'PUT';
+  const expMap = chainData?.[EXP_DATE_MAP_KEY[legType]];
 
   if (!expMap) return null;
 
@@ -320,21 +335,32 @@ export function selectStrategy(direction, ivRank, catalystDaysUntil, stockPrice,
 
   Object.entries(expMap).forEach(([expKey, contracts]) => {
     // expKey format: "2026-04-18:31" (date:dte)
-    const dte = parseInt(expKey.split(':')[1]) || 0;
+    const [expDate, dteStr] = expKey.split(':');
+    const dte = parseInt(dteStr) || 0;
     if (dte < MIN_DTE || dte > MAX_DTE) return;
     if (Math.abs(dte - targetDTE) < Math.abs(bestDTE - targetDTE)) {
       bestDTE = dte;
-      bestExp = expKey.split(':')[0];
+      bestExp = expDate;
       bestContracts = contracts;
     }
   });
 
   if (!bestContracts || !Array.isArray(bestContracts)) return null;
 
-  // Find ATM strike (closest to current price)
-  const sorted = [...bestContracts].sort((a, b) =>
-    Math.abs(a.strikePrice - stockPrice) - Math.abs(b.strikePrice - stockPrice)
-  );
+  // Find ATM strike (closest to current price). Only the three nearest strikes
+  // are ever used, so keep a running top-3 instead of sorting the whole
+  // expiration; ties keep chain order, as the stable sort did.
+  const sorted = [];
+  const dist = [];
+  for (const c of bestContracts) {
+    const d = Math.abs(c.strikePrice - stockPrice);
+    let i = sorted.length;
+    while (i > 0 && d < dist[i - 1]) i--;
+    if (i >= 3) continue;
+    sorted.splice(i, 0, c);
+    dist.splice(i, 0, d);
+    if (sorted.length > 3) { sorted.pop(); dist.pop(); }
+  }
 
   const buyLeg = sorted[0];
   if (!buyLeg) return null;
@@ -347,7 +373,7 @@ export function selectStrategy(direction, ivRank, catalystDaysUntil, stockPrice,
 
   const legs = [{
     action: 'BUY',
-    type: direction === 'BULLISH' ? 'CALL' : 'PUT',
+    type: legType,
     strike: buyLeg.strikePrice,
     expiration: bestExp,
     dte: bestDTE,
@@ -362,13 +388,13 @@ export function selectStrategy(direction, ivRank, catalystDaysUntil, stockPrice,
     : buyLeg.strikePrice - mid;
 
   // Add sell leg for spreads
-  if (strategy.includes('Spread') && sorted.length > 2) {
+  if (strategy.includes('Spread') && bestContracts.length > 2) {
     const sellLeg = sorted[2] || sorted[1]; // 1-2 strikes away
     if (sellLeg && sellLeg.openInterest >= MIN_OI) {
       const sellMid = (sellLeg.ask + sellLeg.bid) / 2;
       legs.push({
         action: 'SELL',
-        type: direction === 'BULLISH' ? 'CALL' : 'PUT',
+        type: legType,
         strike: sellLeg.strikePrice,
         expiration: bestExp,
         dte: bestDTE,
@@ -402,40 +428,45 @@ export function selectStrategy(direction, ivRank, catalystDaysUntil, stockPrice,
 
 // ============================================================
 // MASTER SCORING — Run all 5 layers and produce a card
+// technicals / emaProximity depend only on the ticker's history, so callers
+// scoring several flows per ticker can compute them once and pass them in.
 // ============================================================
-export function scoreOpportunity({ flowData, chainData, closePrices, earningsData, newsData, ticker, stockPrice, volumes }) {
+export function scoreOpportunity({ flowData, chainData, closePrices, earningsData, newsData, ticker, stockPrice, volumes, technicals, emaProximity }) {
   // Layer 1: Flow Intent
   const flow = scoreFlowIntent(flowData);
   if (flow.score === 0) return null;
 
   const direction = flow.direction;
 
-  // Layer 2: Gamma Exposure
-  const gamma = scoreGammaExposure(chainData, stockPrice, direction);
+  // 200 EMA Proximity — if price is below 200 EMA on a bullish setup, don't
+  // surface (above it on a bearish setup is fine — that's breaking support)
+  if (emaProximity === undefined) emaProximity = calculateEma200Proximity(closePrices, volumes, stockPrice);
+  if (direction === 'BULLISH' && emaProximity?.state === 'BELOW_EMA') return null;
 
-  // Layer 3: Volatility Edge
-  const volatility = scoreVolatility(chainData, closePrices, direction);
+  // Layers 2-5 each score 0 or 1 and only 4/5 or 5/5 surfaces, so stop as soon
+  // as two of them miss. Cheapest layers run first.
+  let misses = 0;
 
   // Layer 4: Catalyst
   const catalyst = scoreCatalyst(earningsData, newsData, ticker);
+  if (!catalyst.score) misses++;
+
+  // Layer 2: Gamma Exposure
+  const gamma = scoreGammaExposure(chainData, stockPrice, direction);
+  if (!gamma.score && ++misses > 1) return null;
 
   // Layer 5: Technical Confirmation
-  const technicals = analyzeTechnicals(closePrices);
+  if (technicals === undefined) technicals = analyzeTechnicals(closePrices);
   const technical = scoreTechnicals(technicals, direction);
+  if (!technical.score && ++misses > 1) return null;
 
-  // 200 EMA Proximity
-  const emaProximity = calculateEma200Proximity(closePrices, volumes, stockPrice);
+  // Layer 3: Volatility Edge
+  const volatility = scoreVolatility(chainData, closePrices, direction);
 
   // Total confidence
   const confidence = flow.score + gamma.score + volatility.score + catalyst.score + technical.score;
-
-  // Only surface 4/5 or 5/5
   if (confidence < 4) return null;
 
-  // If price is below 200 EMA on a bullish setup, don't surface
-  if (direction === 'BULLISH' && emaProximity?.state === 'BELOW_EMA') return null;
-  // If price is above 200 EMA on a bearish setup, that's fine (breaking support)
-
   // Select strategy
   const suggestedPlay = selectStrategy(
     direction,
@@ -1,8 +1,24 @@
 // lib/finnhub.js
 // Finnhub API — fundamentals, news, earnings, analyst recommendations
 
+import { createWindowLimiter } from './ratelimit.js';
+
 const BASE = 'https://finnhub.io/api/v1';
 
+// Finnhub's free tier allows 60 calls per rolling minute and, separately, 30
+// calls/second — enforce both windows (with a little headroom on the
+// per-second one) instead of letting bursts run into 429s. A cold scan's ~51
+// calls then go out in about 2s rather than trickling at the average rate.
+const FINNHUB_MAX_REQUESTS_PER_MINUTE = 60;
+const FINNHUB_MAX_REQUESTS_PER_SECOND = 25;
+const acquireMinuteSlot = createWindowLimiter(FINNHUB_MAX_REQUESTS_PER_MINUTE, 60 * 1000);
+const acquireSecondSlot = createWindowLimiter(FINNHUB_MAX_REQUESTS_PER_SECOND, 1000);
+
+async function acquireRequestSlot() {
+  await acquireMinuteSlot();
+  await acquireSecondSlot();
+}
+
 async function finnhubFetch(endpoint, params = {}) {
   const key = process.env.FINNHUB_API_KEY;
   if (!key) throw new Error('Missing FINNHUB_API_KEY');
@@ -13,6 +29,7 @@ async function finnhubFetch(endpoint, params = {}) {
     if (v !== undefined && v !== null) url.searchParams.set(k, String(v));
   });
 
+  await acquireRequestSlot();
   const res = await fetch(url.toString());
   if (!res.ok) return null;
   return res.json();
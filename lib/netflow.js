@@ -12,11 +12,25 @@ let dailyFlow = {
   tickerFlows: {},
 };
 
-// Calculate net premium flow from a chain scan
-export function calculateNetFlow(ticker, chainData) {
-  if (!chainData) return;
+// UTC day key ("2026-04-01"), rebuilt only once the clock passes the next
+// UTC midnight instead of formatting a Date for every ticker on every scan
+const DAY_MS = 24 * 60 * 60 * 1000;
+let dayKey = null;
+let dayKeyExpires = 0;
 
-  const today = new Date().toISOString().split('T')[0];
+function currentDayKey() {
+  const now = Date.now();
+  if (now >= dayKeyExpires) {
+    dayKey = new Date(now).toISOString().split('T')[0];
+    dayKeyExpires = (Math.floor(now / DAY_MS) + 1) * DAY_MS;
+  }
+  return dayKey;
+}
+
+// Record a ticker's call/put premium totals (volume × mid × 100, summed by the
+// scan while it walks the chain for unusual flow)
+export function recordNetFlow(ticker, tickerCallPremium, tickerPutPremium) {
+  const today = currentDayKey();
   if (dailyFlow.date !== today) {
     // Reset for new day
     dailyFlow = {
@@ -29,33 +43,6 @@ export function calculateNetFlow(ticker, chainData) {
     };
   }
 
-  let tickerCallPremium = 0;
-  let tickerPutPremium = 0;
-
-  // Sum call premium (volume × mid price × 100)
-  if (chainData.callExpDateMap) {
-    Object.values(chainData.callExpDateMap).forEach(contracts => {
-      if (!Array.isArray(contracts)) return;
-      contracts.forEach(c => {
-        const vol = c.totalVolume || 0;
-        const mid = ((c.bid || 0) + (c.ask || 0)) / 2;
-        tickerCallPremium += vol * mid * 100;
-      });
-    });
-  }
-
-  // Sum put premium
-  if (chainData.putExpDateMap) {
-    Object.values(chainData.putExpDateMap).forEach(contracts => {
-      if (!Array.isArray(contracts)) return;
-      contracts.forEach(c => {
-        const vol = c.totalVolume || 0;
-        const mid = ((c.bid || 0) + (c.ask || 0)) / 2;
-        tickerPutPremium += vol * mid * 100;
-      });
-    });
-  }
-
   // Store per-ticker flow
   const prevTicker = dailyFlow.tickerFlows[ticker] || { call: 0, put: 0 };
   dailyFlow.callPremium -= prevTicker.call;
@@ -77,6 +64,30 @@ export function calculateNetFlow(ticker, chainData) {
   else dailyFlow.sentiment = 'STRONG_BEARISH';
 }
 
+// Sentiment buckets that count as agreeing with a card's direction
+const BULLISH_SENTIMENTS = new Set(['BULLISH', 'STRONG_BULLISH']);
+const BEARISH_SENTIMENTS = new Set(['BEARISH', 'STRONG_BEARISH']);
+
+// Shared by every getMarketFlow() result — they read the live dailyFlow,
+// so there is no need to allocate fresh closures per call
+function flowAligned(direction) {
+  if (direction === 'BULLISH') return BULLISH_SENTIMENTS.has(dailyFlow.sentiment);
+  if (direction === 'BEARISH') return BEARISH_SENTIMENTS.has(dailyFlow.sentiment);
+  return true;
+}
+
+function flowDescription(direction) {
+  const aligned = (direction === 'BULLISH' && dailyFlow.netPremium > 0) ||
+                  (direction === 'BEARISH' && dailyFlow.netPremium < 0);
+  if (dailyFlow.sentiment === 'NEUTRAL') {
+    return 'Market flow is neutral today — no strong directional bias across the 25 names.';
+  }
+  if (aligned) {
+    return `Broad market flow supports this direction — net premium is leaning ${dailyFlow.sentiment.toLowerCase().replace('_', ' ')} today.`;
+  }
+  return `Note: This is a contrarian setup — overall market flow is leaning ${dailyFlow.sentiment.toLowerCase().replace('_', ' ')} today, though individual name flow is strong.`;
+}
+
 export function getMarketFlow() {
   const net = dailyFlow.netPremium;
   const formatted = Math.abs(net) >= 1000000000
@@ -91,22 +102,8 @@ export function getMarketFlow() {
     formatted: `${net >= 0 ? '+' : ''}$${formatted}`,
     callPremium: dailyFlow.callPremium,
     putPremium: dailyFlow.putPremium,
-    aligned: (direction) => {
-      if (direction === 'BULLISH') return ['BULLISH', 'STRONG_BULLISH'].includes(dailyFlow.sentiment);
-      if (direction === 'BEARISH') return ['BEARISH', 'STRONG_BEARISH'].includes(dailyFlow.sentiment);
-      return true;
-    },
-    description: (direction) => {
-      const aligned = (direction === 'BULLISH' && dailyFlow.netPremium > 0) ||
-                      (direction === 'BEARISH' && dailyFlow.netPremium < 0);
-      if (dailyFlow.sentiment === 'NEUTRAL') {
-        return 'Market flow is neutral today — no strong directional bias across the 25 names.';
-      }
-      if (aligned) {
-        return `Broad market flow supports this direction — net premium is leaning ${dailyFlow.sentiment.toLowerCase().replace('_', ' ')} today.`;
-      }
-      return `Note: This is a contrarian setup — overall market flow is leaning ${dailyFlow.sentiment.toLowerCase().replace('_', ' ')} today, though individual name flow is strong.`;
-    },
+    aligned: flowAligned,
+    description: flowDescription,
   };
 }
 
@@ -0,0 +1,87 @@
+// lib/ratelimit.js
+// Rate limiting (token bucket / rolling window) + bounded concurrency for upstream API calls
+
+// Token bucket: refills continuously at maxPerMinute / 60s, holds at most
+// maxPerMinute tokens. Tokens are reserved synchronously so concurrent
+// callers queue up in order instead of all seeing the same free slot.
+// acquire.backoff(ms) empties the bucket and holds every caller — including
+// ones already waiting for a token — until ms has passed (e.g. when the
+// server answers 429 with Retry-After).
+export function createRateLimiter(maxPerMinute) {
+  const capacity = maxPerMinute;
+  const refillPerMs = maxPerMinute / 60000;
+  let tokens = capacity;
+  let lastRefill = performance.now(); // monotonic — wall-clock steps can't drain the bucket
+  let blockedUntil = 0;
+
+  const refill = () => {
+    const now = performance.now();
+    tokens = Math.min(capacity, tokens + (now - lastRefill) * refillPerMs);
+    lastRefill = now;
+  };
+
+  async function acquire() {
+    refill();
+    tokens -= 1;
+    if (tokens < 0) await sleep(-tokens / refillPerMs);
+    // A backoff() issued while we slept still applies
+    let wait;
+    while ((wait = blockedUntil - performance.now()) > 0) await sleep(wait);
+  }
+
+  acquire.backoff = (ms) => {
+    refill();
+    tokens = Math.min(tokens, -ms * refillPerMs);
+    blockedUntil = Math.max(blockedUntil, performance.now() + ms);
+  };
+
+  return acquire;
+}
+
+// Rolling window: at most maxCalls start within any windowMs span. For APIs
+// whose published limits are windows rather than a refill rate — several can
+// be chained to enforce e.g. a per-second and a per-minute cap together.
+// Send times are reserved synchronously, so concurrent callers queue in order.
+export function createWindowLimiter(maxCalls, windowMs) {
+  const sendTimes = []; // reserved send times, ascending
+
+  return async function acquire() {
+    const now = performance.now();
+    while (sendTimes.length && sendTimes[0] <= now - windowMs) sendTimes.shift();
+    // Free slot once the call maxCalls back has left the window
+    let at = sendTimes.length >= maxCalls ? sendTimes[sendTimes.length - maxCalls] + windowMs : now;
+    if (sendTimes.length) at = Math.max(at, sendTimes[sendTimes.length - 1]);
+    sendTimes.push(at);
+    // Timers may fire a hair early — don't start until the slot has opened
+    let wait = at - now;
+    while (wait > 0) {
+      await sleep(wait);
+      wait = at - performance.now();
+    }
+  };
+}
+
+function sleep(ms) {
+  return new Promise(r => setTimeout(r, ms));
+}
+
+// Run fn over items with at most `limit` calls in flight.
+// Resolves to the same { status, value | reason } shape as Promise.allSettled.
+export async function mapWithConcurrency(items, limit, fn) {
+  const results = new Array(items.length);
+  let next = 0;
+
+  const worker = async () => {
+    while (next < items.length) {
+      const i = next++;
+      try {
+        results[i] = { status: 'fulfilled', value: await fn(items[i], i) };
+      } catch (reason) {
+        results[i] = { status: 'rejected', reason };
+      }
+    }
+  };
+
+  await Promise.all(Array.from({ length: Math.min(limit, items.length) }, worker));
+  return results;
+}
@@ -2,34 +2,57 @@
 // Schwab API — OAuth auth (preserved from original app) + data fetching
 // Chain data is normalized from Schwab's strike-keyed format to flat arrays
 
+import { readFileSync, writeFileSync, renameSync, mkdirSync, statSync } from 'fs';
+import { tmpdir } from 'os';
+import { join } from 'path';
+import { createRateLimiter } from './ratelimit.js';
+
+// Schwab market data allows 120 requests/minute per app
+const SCHWAB_MAX_REQUESTS_PER_MINUTE = 120;
+const acquireRequestSlot = createRateLimiter(SCHWAB_MAX_REQUESTS_PER_MINUTE);
+
+// Credentials are read once at module load — env doesn't change within a process
+const SCHWAB_CREDENTIALS = Object.freeze({
+  appKey: process.env.SCHWAB_APP_KEY,
+  appSecret: process.env.SCHWAB_APP_SECRET,
+  refreshToken: process.env.SCHWAB_REFRESH_TOKEN,
+});
+
+// Basic auth header for the token endpoint — fixed for the life of the process
+const SCHWAB_BASIC_AUTH = `Basic ${Buffer.from(`${SCHWAB_CREDENTIALS.appKey}:${SCHWAB_CREDENTIALS.appSecret}`).toString('base64')}`;
+
 let cachedAccessToken = null;
+// Monotonic (performance.now) deadline — immune to wall-clock adjustments
 let tokenExpiry = 0;
 
-export async function getAccessToken() {
-  const appKey = process.env.SCHWAB_APP_KEY;
-  const appSecret = process.env.SCHWAB_APP_SECRET;
-  const refreshToken = process.env.SCHWAB_REFRESH_TOKEN;
+// A token this close to expiry is refreshed in the background while requests
+// keep using it, so no scan stalls on the OAuth round trip. Past the hard
+// margin the caller has to wait for a fresh one.
+const TOKEN_REFRESH_AHEAD_MS = 5 * 60 * 1000;
+const TOKEN_EXPIRY_MARGIN_MS = 60 * 1000;
 
-  if (!appKey || !appSecret || !refreshToken) {
-    console.error('Missing Schwab credentials');
-    return null;
-  }
+// One refresh at a time — every caller that needs a new token while one is
+// being fetched awaits that same request instead of issuing its own
+let refreshInFlight = null;
 
-  if (cachedAccessToken && Date.now() < tokenExpiry - 60000) {
-    return cachedAccessToken;
+function refreshAccessToken() {
+  if (!refreshInFlight) {
+    refreshInFlight = requestAccessToken().finally(() => { refreshInFlight = null; });
   }
+  return refreshInFlight;
+}
 
+async function requestAccessToken() {
   try {
-    const credentials = Buffer.from(`${appKey}:${appSecret}`).toString('base64');
     const response = await fetch('https://api.schwabapi.com/v1/oauth/token', {
       method: 'POST',
       headers: {
-        'Authorization': `Basic ${credentials}`,
+        'Authorization': SCHWAB_BASIC_AUTH,
         'Content-Type': 'application/x-www-form-urlencoded',
       },
       body: new URLSearchParams({
         'grant_type': 'refresh_token',
-        'refresh_token': refreshToken,
+        'refresh_token': SCHWAB_CREDENTIALS.refreshToken,
       }),
     });
 
@@ -41,7 +64,7 @@ export async function getAccessToken() {
 
     const data = await response.json();
     cachedAccessToken = data.access_token;
-    tokenExpiry = Date.now() + (data.expires_in * 1000);
+    tokenExpiry = performance.now() + (data.expires_in * 1000);
     return cachedAccessToken;
   } catch (error) {
     console.error('Error refreshing Schwab token:', error);
@@ -49,6 +72,43 @@ export async function getAccessToken() {
   }
 }
 
+export async function getAccessToken() {
+  const { appKey, appSecret, refreshToken } = SCHWAB_CREDENTIALS;
+
+  if (!appKey || !appSecret || !refreshToken) {
+    console.error('Missing Schwab credentials');
+    return null;
+  }
+
+  const now = performance.now();
+  if (cachedAccessToken && now < tokenExpiry - TOKEN_EXPIRY_MARGIN_MS) {
+    if (now >= tokenExpiry - TOKEN_REFRESH_AHEAD_MS) {
+      // Still valid — hand it out and renew off the request path. A failed
+      // renewal keeps the current token until the hard margin.
+      refreshAccessToken();
+    }
+    return cachedAccessToken;
+  }
+
+  return refreshAccessToken();
+}
+
+// Request headers for the current access token — rebuilt only when the token
+// changes instead of allocating a fresh object on every API call
+let bearerHeaders = null;
+let bearerHeadersToken = null;
+
+function headersFor(token) {
+  if (token !== bearerHeadersToken) {
+    bearerHeaders = Object.freeze({ 'Authorization': `Bearer ${token}`, 'Accept': 'application/json' });
+    bearerHeadersToken = token;
+  }
+  return bearerHeaders;
+}
+
+// Longest Retry-After worth waiting out inside a live request
+const MAX_RETRY_AFTER_MS = 5 * 1000;
+
 async function schwabFetch(endpoint, params = {}) {
   const token = await getAccessToken();
   if (!token) throw new Error('Schwab auth failed');
@@ -58,9 +118,21 @@ async function schwabFetch(endpoint, params = {}) {
     if (v !== undefined && v !== null) url.searchParams.set(k, String(v));
   });
 
-  const res = await fetch(url.toString(), {
-    headers: { 'Authorization': `Bearer ${token}`, 'Accept': 'application/json' },
-  });
+  await acquireRequestSlot();
+  let res = await fetch(url.toString(), { headers: headersFor(token) });
+
+  const retryAfterMs = res.status === 429
+    ? (parseFloat(res.headers.get('retry-after')) || 1) * 1000
+    : 0;
+  if (retryAfterMs > 0 && retryAfterMs <= MAX_RETRY_AFTER_MS) {
+    // Throttled anyway — release the connection, hold every caller (queued
+    // or new) back for Retry-After, then retry once. Longer waits fall
+    // through and throw rather than parking every request in the process.
+    await res.body?.cancel();
+    acquireRequestSlot.backoff(retryAfterMs);
+    await acquireRequestSlot();
+    res = await fetch(url.toString(), { headers: headersFor(token) });
+  }
 
   if (!res.ok) {
     const errText = await res.text();
@@ -101,7 +173,32 @@ function normalizeExpDateMap(expDateMap) {
 }
 
 // ── Fetch options chain (normalized) ──
-export async function getOptionsChain(ticker) {
+// Chains are the largest Schwab payload and several routes ask for the same
+// ticker; a request within CHAIN_TTL of the last one (or while it is still in
+// flight) shares that response instead of spending another rate-limit slot.
+const CHAIN_TTL = 15 * 1000; // 15 seconds
+const chainCache = {}; // ticker -> { promise, timestamp }
+
+export function getOptionsChain(ticker) {
+  const cached = chainCache[ticker];
+  if (cached && Date.now() - cached.timestamp < CHAIN_TTL) return cached.promise;
+
+  const promise = fetchOptionsChain(ticker);
+  const timestamp = Date.now();
+  chainCache[ticker] = { promise, timestamp };
+  // Never hold on to a failed or empty fetch, and drop good ones once they
+  // expire — any ticker a request names lands here, so entries must not
+  // outlive CHAIN_TTL waiting for the same ticker to come round again
+  const evict = () => { if (chainCache[ticker]?.promise === promise) delete chainCache[ticker]; };
+  promise.then(chain => {
+    if (!chain) return evict();
+    setTimeout(evict, Math.max(0, timestamp + CHAIN_TTL - Date.now())).unref?.();
+  }, evict);
+  return promise;
+}
+
+// Uncached fetch — for probes (e.g. /api/health) that must actually reach Schwab
+export async function fetchOptionsChain(ticker) {
   const fromDate = new Date(Date.now() + 14 * 24 * 60 * 60 * 1000)
     .toISOString().split('T')[0];
   const toDate = new Date(Date.now() + 730 * 24 * 60 * 60 * 1000)
@@ -125,19 +222,61 @@ export async function getOptionsChain(ticker) {
 }
 
 // ── Fetch quotes ──
-export async function getQuote(ticker) {
-  const data = await schwabFetch('/marketdata/v1/quotes', {
-    symbols: ticker,
-    fields: 'quote',
+// Single-symbol quotes requested within QUOTE_COALESCE_MS of each other share
+// one /quotes call instead of paying a rate-limit slot and round trip each
+const QUOTE_COALESCE_MS = 10;
+let pendingQuotes = null; // Map<ticker, [{ resolve, reject }]>
+let pendingQuotesTimer = null;
+
+function flushQuotes() {
+  clearTimeout(pendingQuotesTimer);
+  const batch = pendingQuotes;
+  pendingQuotes = null;
+  getQuotes([...batch.keys()]).then(
+    data => batch.forEach((waiters, ticker) => {
+      // Fall back to the raw response only when it can't hold anyone else's
+      // quote — a symbol missing from a batched reply resolves to null
+      const quote = batch.size === 1 ? (data?.[ticker] || data) : (data?.[ticker] || null);
+      waiters.forEach(w => w.resolve(quote));
+    }),
+    err => batch.forEach(waiters => waiters.forEach(w => w.reject(err))),
+  );
+}
+
+export function getQuote(ticker) {
+  return new Promise((resolve, reject) => {
+    if (!pendingQuotes) {
+      pendingQuotes = new Map();
+      pendingQuotesTimer = setTimeout(flushQuotes, QUOTE_COALESCE_MS);
+    }
+    const waiters = pendingQuotes.get(ticker);
+    if (waiters) waiters.push({ resolve, reject });
+    else pendingQuotes.set(ticker, [{ resolve, reject }]);
+    if (pendingQuotes.size >= MAX_QUOTE_SYMBOLS) flushQuotes();
   });
-  return data?.[ticker] || data;
 }
 
+// Schwab's quotes endpoint accepts up to 500 symbols per call — batch to that,
+// so any realistic list is one round trip (undici keeps the connection alive)
+const MAX_QUOTE_SYMBOLS = 500;
+
 export async function getQuotes(tickers) {
-  return schwabFetch('/marketdata/v1/quotes', {
-    symbols: tickers.join(','),
+  if (tickers.length <= MAX_QUOTE_SYMBOLS) {
+    return schwabFetch('/marketdata/v1/quotes', {
+      symbols: tickers.join(','),
+      fields: 'quote',
+    });
+  }
+
+  const batches = [];
+  for (let i = 0; i < tickers.length; i += MAX_QUOTE_SYMBOLS) {
+    batches.push(tickers.slice(i, i + MAX_QUOTE_SYMBOLS));
+  }
+  const results = await Promise.all(batches.map(batch => schwabFetch('/marketdata/v1/quotes', {
+    symbols: batch.join(','),
     fields: 'quote',
-  });
+  })));
+  return Object.assign({}, ...results);
 }
 
 // ── Fetch price history ──
@@ -151,6 +290,95 @@ export async function getPriceHistory(ticker, periodType = 'year', period = 1, f
   });
 }
 
+// ── Cached price history ──
+// Daily candles don't change intraday, so history is cached per symbol + bar
+// spec for an hour and shared by every route that needs it. The cache is
+// snapshotted to disk so a restarted process starts warm instead of
+// refetching years of candles; entries keep their original timestamps, so
+// the TTL still applies after a reload.
+const PRICE_HISTORY_TTL = 60 * 60 * 1000; // 1 hour
+// The snapshot lives in an app-owned, private directory rather than at a fixed
+// name in the shared tmp dir, where another local process could pre-create or
+// rewrite it. If the directory isn't ours alone, the cache stays memory-only.
+const CACHE_DIR = process.env.FLOWHUNTER_CACHE_DIR || join(tmpdir(), 'flowhunter-cache');
+const PRICE_HISTORY_SNAPSHOT = join(CACHE_DIR, 'schwab-price-history.json');
+let priceHistoryCache = {};
+let priceHistorySnapshotStale = false;
+
+function ensurePrivateCacheDir() {
+  try {
+    mkdirSync(CACHE_DIR, { recursive: true, mode: 0o700 });
+    const st = statSync(CACHE_DIR);
+    if (!st.isDirectory()) return false;
+    if (process.getuid && st.uid !== process.getuid()) return false;
+    return (st.mode & 0o022) === 0; // not group/world writable
+  } catch {
+    return false;
+  }
+}
+const snapshotEnabled = ensurePrivateCacheDir();
+
+// Shape every cache entry must have: { data: { candles: [] }, timestamp }
+function isCachedHistory(entry) {
+  return entry !== null && typeof entry === 'object' &&
+    Number.isFinite(entry.timestamp) && entry.timestamp <= Date.now() &&
+    entry.data !== null && typeof entry.data === 'object' &&
+    Array.isArray(entry.data.candles);
+}
+
+// Drop expired entries — any ticker a request names lands in the cache, so
+// without this it (and the snapshot) would only ever grow
+function prunePriceHistory() {
+  const now = Date.now();
+  Object.keys(priceHistoryCache).forEach(key => {
+    if (!(now - priceHistoryCache[key]?.timestamp < PRICE_HISTORY_TTL)) delete priceHistoryCache[key];
+  });
+}
+
+// Load the snapshot, keeping only well-formed entries
+try {
+  if (snapshotEnabled) {
+    const snapshot = JSON.parse(readFileSync(PRICE_HISTORY_SNAPSHOT, 'utf8'));
+    if (snapshot !== null && typeof snapshot === 'object' && !Array.isArray(snapshot)) {
+      Object.entries(snapshot).forEach(([key, entry]) => {
+        if (key !== '__proto__' && isCachedHistory(entry)) priceHistoryCache[key] = entry;
+      });
+      prunePriceHistory();
+    }
+  }
+} catch {
+  // No snapshot yet (or unreadable) — start cold
+}
+
+export async function getCachedPriceHistory(ticker, periodType = 'year', period = 1, frequencyType = 'daily', frequency = 1) {
+  const key = `${ticker}|${periodType}|${period}|${frequencyType}|${frequency}`;
+  const cached = priceHistoryCache[key];
+  if (cached && Date.now() - cached.timestamp < PRICE_HISTORY_TTL) {
+    return cached.data;
+  }
+  const data = await getPriceHistory(ticker, periodType, period, frequencyType, frequency);
+  if (data) {
+    priceHistoryCache[key] = { data, timestamp: Date.now() };
+    priceHistorySnapshotStale = true;
+  }
+  return data;
+}
+
+// Persist the cache if anything was refreshed since the last save
+export function savePriceHistorySnapshot() {
+  if (!snapshotEnabled || !priceHistorySnapshotStale) return;
+  prunePriceHistory();
+  try {
+    // Write then rename so a crash mid-write never leaves a truncated snapshot
+    const tmp = `${PRICE_HISTORY_SNAPSHOT}.${process.pid}.tmp`;
+    writeFileSync(tmp, JSON.stringify(priceHistoryCache), { mode: 0o600 });
+    renameSync(tmp, PRICE_HISTORY_SNAPSHOT);
+    priceHistorySnapshotStale = false;
+  } catch {
+    // Read-only or full filesystem — the in-memory cache still works
+  }
+}
+
 // ── Fetch movers ──
 export async function getMovers(index = '$SPX') {
   return schwabFetch(`/marketdata/v1/movers/${index}`, {
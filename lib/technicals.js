@@ -1,44 +1,71 @@
 // lib/technicals.js
 // Technical indicator calculations from price history data
 
-// Simple Moving Average
+// Close and volume series from Schwab candles, split in one pass. Memoized on
+// the candles array, so cached price history yields the same (read-only)
+// series on every scan instead of two fresh maps each time.
+const seriesByCandles = new WeakMap();
+const EMPTY_SERIES = Object.freeze({ closes: Object.freeze([]), volumes: Object.freeze([]) });
+
+export function candleSeries(candles) {
+  if (!Array.isArray(candles)) return EMPTY_SERIES;
+  let series = seriesByCandles.get(candles);
+  if (!series) {
+    const n = candles.length;
+    const closes = new Array(n);
+    const volumes = new Array(n);
+    for (let i = 0; i < n; i++) {
+      closes[i] = candles[i].close;
+      volumes[i] = candles[i].volume;
+    }
+    series = { closes, volumes };
+    seriesByCandles.set(candles, series);
+  }
+  return series;
+}
+
+// Simple Moving Average (over the last `period` prices, read in place)
 export function sma(prices, period) {
   if (prices.length < period) return null;
-  const slice = prices.slice(-period);
-  return slice.reduce((a, b) => a + b, 0) / period;
+  let sum = 0;
+  for (let i = prices.length - period; i < prices.length; i++) sum += prices[i];
+  return sum / period;
 }
 
 // Exponential Moving Average
 export function ema(prices, period) {
   if (prices.length < period) return null;
   const k = 2 / (period + 1);
-  let emaVal = sma(prices.slice(0, period), period);
+  // Seed with the SMA of the first `period` prices, then run the recurrence
+  let seed = 0;
+  for (let i = 0; i < period; i++) seed += prices[i];
+  let emaVal = seed / period;
   for (let i = period; i < prices.length; i++) {
     emaVal = prices[i] * k + emaVal * (1 - k);
   }
   return emaVal;
 }
 
-// RSI (14-period default)
+// RSI (14-period default) — Wilder smoothing over bar-to-bar changes,
+// read straight from the prices with no intermediate change array
 export function rsi(prices, period = 14) {
   if (prices.length < period + 1) return null;
-  const changes = [];
-  for (let i = 1; i < prices.length; i++) {
-    changes.push(prices[i] - prices[i - 1]);
-  }
 
   let avgGain = 0, avgLoss = 0;
-  for (let i = 0; i < period; i++) {
-    if (changes[i] > 0) avgGain += changes[i];
-    else avgLoss += Math.abs(changes[i]);
+  for (let i = 1; i <= period; i++) {
+    const change = prices[i] - prices[i - 1];
+    if (change > 0) avgGain += change;
+    else avgLoss -= change;
   }
   avgGain /= period;
   avgLoss /= period;
 
-  for (let i = period; i < changes.length; i++) {
-    const change = changes[i];
-    avgGain = (avgGain * (period - 1) + (change > 0 ? change : 0)) / period;
-    avgLoss = (avgLoss * (period - 1) + (change < 0 ? Math.abs(change) : 0)) / period;
+  for (let i = period + 1; i < prices.length; i++) {
+    const change = prices[i] - prices[i - 1];
+    const gain = change > 0 ? change : 0;
+    const loss = change < 0 ? -change : 0;
+    avgGain = (avgGain * (period - 1) + gain) / period;
+    avgLoss = (avgLoss * (period - 1) + loss) / period;
   }
 
   if (avgLoss === 0) return 100;
@@ -47,29 +74,45 @@ export function rsi(prices, period = 14) {
 }
 
 // MACD (12, 26, 9)
+// EMA12, EMA26 and the signal EMA are all recurrences, so one pass over the
+// prices updates all three: each bar's EMA12 - EMA26 is that bar's MACD value,
+// which feeds the signal line directly (no per-bar prefix re-scan).
 export function macd(prices) {
   if (prices.length < 26) return null;
-  const ema12 = ema(prices, 12);
-  const ema26 = ema(prices, 26);
-  const macdLine = ema12 - ema26;
-
-  // Calculate signal line from MACD history
-  const macdHistory = [];
-  for (let i = 26; i <= prices.length; i++) {
-    const slice = prices.slice(0, i);
-    const e12 = ema(slice, 12);
-    const e26 = ema(slice, 26);
-    macdHistory.push(e12 - e26);
+  const k12 = 2 / 13, k26 = 2 / 27, k9 = 2 / 10;
+
+  let e12 = 0, e26 = 0;
+  let macdLine = null, prevMacd = null;
+  let signalLine = null, prevSignal = null, signalSeed = 0;
+  let macdCount = 0;
+  for (let i = 0; i < prices.length; i++) {
+    const p = prices[i];
+    // Each EMA is seeded with the SMA of its first `period` prices
+    if (i < 12) { e12 += p; if (i === 11) e12 /= 12; }
+    else e12 = p * k12 + e12 * (1 - k12);
+    if (i < 26) { e26 += p; if (i === 25) e26 /= 26; }
+    else e26 = p * k26 + e26 * (1 - k26);
+    if (i < 25) continue;
+
+    prevMacd = macdLine;
+    macdLine = e12 - e26;
+    macdCount++;
+
+    // Signal line: SMA seed over the first 9 MACD values, then its own EMA
+    prevSignal = signalLine;
+    if (macdCount <= 9) {
+      signalSeed += macdLine;
+      if (macdCount === 9) signalLine = signalSeed / 9;
+    } else {
+      signalLine = macdLine * k9 + signalLine * (1 - k9);
+    }
   }
 
-  const signalLine = macdHistory.length >= 9 ? ema(macdHistory, 9) : null;
   const histogram = signalLine !== null ? macdLine - signalLine : null;
 
   // Detect crossover
   let signal = 'NEUTRAL';
-  if (macdHistory.length >= 2 && signalLine !== null) {
-    const prevMacd = macdHistory[macdHistory.length - 2];
-    const prevSignal = ema(macdHistory.slice(0, -1), 9);
+  if (macdCount >= 2 && signalLine !== null) {
     if (prevMacd <= prevSignal && macdLine > signalLine) signal = 'BULLISH_CROSS';
     else if (prevMacd >= prevSignal && macdLine < signalLine) signal = 'BEARISH_CROSS';
     else if (macdLine > signalLine) signal = 'BULLISH';
@@ -82,10 +125,14 @@ export function macd(prices) {
 // Bollinger Bands (20, 2)
 export function bollingerBands(prices, period = 20, stdDev = 2) {
   if (prices.length < period) return null;
-  const slice = prices.slice(-period);
-  const mean = slice.reduce((a, b) => a + b, 0) / period;
-  const variance = slice.reduce((sum, p) => sum + Math.pow(p - mean, 2), 0) / period;
-  const sd = Math.sqrt(variance);
+  const start = prices.length - period;
+  const mean = sma(prices, period);
+  let sqDev = 0;
+  for (let i = start; i < prices.length; i++) {
+    const d = prices[i] - mean;
+    sqDev += d * d;
+  }
+  const sd = Math.sqrt(sqDev / period);
 
   const upper = mean + stdDev * sd;
   const lower = mean - stdDev * sd;
@@ -107,22 +154,45 @@ export function bollingerBands(prices, period = 20, stdDev = 2) {
 // Realized volatility (annualized, from daily closes)
 export function realizedVol(prices, days = 20) {
   if (prices.length < days + 1) return null;
-  const returns = [];
-  const slice = prices.slice(-(days + 1));
-  for (let i = 1; i < slice.length; i++) {
-    returns.push(Math.log(slice[i] / slice[i - 1]));
+  const returns = new Array(days);
+  const start = prices.length - days;
+  let sum = 0;
+  for (let i = 0; i < days; i++) {
+    returns[i] = Math.log(prices[start + i] / prices[start + i - 1]);
+    sum += returns[i];
+  }
+  const mean = sum / days;
+  let sqDev = 0;
+  for (let i = 0; i < days; i++) {
+    const d = returns[i] - mean;
+    sqDev += d * d;
   }
-  const mean = returns.reduce((a, b) => a + b, 0) / returns.length;
-  const variance = returns.reduce((sum, r) => sum + Math.pow(r - mean, 2), 0) / (returns.length - 1);
+  const variance = sqDev / (days - 1);
   return Math.sqrt(variance) * Math.sqrt(252) * 100; // annualized %
 }
 
+// Indicator results depend only on the close series, and candleSeries() hands
+// out the same array for as long as a ticker's history stays cached — so the
+// results are memoized on that array and shared across scans and routes.
+// Close series must not be mutated once passed in.
+const technicalsBySeries = new WeakMap();
+const ema200BySeries = new WeakMap();
+
 // Run all technicals on a price array and return a summary
 export function analyzeTechnicals(closePrices) {
   if (!closePrices || closePrices.length < 50) {
     return { score: 0, description: 'Insufficient price data for technical analysis' };
   }
 
+  let result = technicalsBySeries.get(closePrices);
+  if (!result) {
+    result = computeTechnicals(closePrices);
+    technicalsBySeries.set(closePrices, result);
+  }
+  return result;
+}
+
+function computeTechnicals(closePrices) {
   const currentPrice = closePrices[closePrices.length - 1];
   const rsiVal = rsi(closePrices);
   const macdResult = macd(closePrices);
@@ -181,11 +251,11 @@ export function scoreTechnicals(technicals, direction) {
 // TREND DETECTION
 // ============================================================
 
-function detectTrendContext(closePrices) {
+// ema200Val comes from the caller, which has already computed it
+function detectTrendContext(closePrices, ema200Val) {
   if (!closePrices || closePrices.length < 200) return null;
 
   const ema50 = ema(closePrices, 50);
-  const ema200Val = ema(closePrices, 200);
   if (!ema50 || !ema200Val) return null;
 
   const currentPrice = closePrices[closePrices.length - 1];
@@ -197,12 +267,21 @@ function detectTrendContext(closePrices) {
   const price50ago = closePrices.length >= 51 ? closePrices[closePrices.length - 51] : currentPrice;
   const priceSlope50d = ((currentPrice - price50ago) / price50ago) * 100;
 
-  // Higher high / lower low pattern (last 40 days)
-  const recent = closePrices.slice(-40);
-  const firstHalf = recent.slice(0, 20);
-  const secondHalf = recent.slice(20);
-  const makingLowerHighs = Math.max(...secondHalf) < Math.max(...firstHalf);
-  const makingLowerLows = Math.min(...secondHalf) < Math.min(...firstHalf);
+  // Higher high / lower low pattern (last 40 days) — both halves' extremes in one pass
+  let firstHigh = -Infinity, firstLow = Infinity, secondHigh = -Infinity, secondLow = Infinity;
+  const mid = closePrices.length - 20;
+  for (let i = closePrices.length - 40; i < closePrices.length; i++) {
+    const p = closePrices[i];
+    if (i < mid) {
+      if (p > firstHigh) firstHigh = p;
+      if (p < firstLow) firstLow = p;
+    } else {
+      if (p > secondHigh) secondHigh = p;
+      if (p < secondLow) secondLow = p;
+    }
+  }
+  const makingLowerHighs = secondHigh < firstHigh;
+  const makingLowerLows = secondLow < firstLow;
 
   let trend, trendLabel, trendColor;
 
@@ -258,10 +337,15 @@ function detectTrendContext(closePrices) {
 export function calculateEma200Proximity(closePrices, volumes, livePrice) {
   if (!closePrices || closePrices.length < 200) return null;
 
-  const ema200Val = ema(closePrices, 200);
+  let memo = ema200BySeries.get(closePrices);
+  if (!memo) {
+    const ema200Val = ema(closePrices, 200);
+    memo = { ema200Val, trendContext: ema200Val ? detectTrendContext(closePrices, ema200Val) : null };
+    ema200BySeries.set(closePrices, memo);
+  }
+  const { ema200Val, trendContext } = memo;
   if (!ema200Val) return null;
 
-  const trendContext = detectTrendContext(closePrices);
   const currentPrice = livePrice || closePrices[closePrices.length - 1];
   const ema200Rounded = Math.round(ema200Val * 100) / 100;
   const distance = ((currentPrice - ema200Val) / ema200Val) * 100;
@@ -14,6 +14,17 @@ export function getTrackedTrades() {
   );
 }
 
+// Live (non-expired) trades, optionally for one ticker. Yielded lazily in
+// activation order — per-ticker scan updates don't need the sorted array.
+export function* iterActiveTrades(ticker) {
+  for (const id in trackedTrades) {
+    const trade = trackedTrades[id];
+    if (trade.status === 'EXPIRED') continue;
+    if (ticker && trade.ticker !== ticker) continue;
+    yield trade;
+  }
+}
+
 export function activateTrade(card) {
   const id = card.id;
   const primaryLeg = card.suggestedPlay.legs[0];
@@ -50,9 +61,10 @@ export function activateTrade(card) {
 }
 
 export function deactivateTrade(id) {
-  if (trackedTrades[id]) {
-    trackedTrades[id].status = 'EXPIRED';
-    trackedTrades[id].statusDescription = 'Trade manually closed.';
+  const trade = trackedTrades[id];
+  if (trade) {
+    trade.status = 'EXPIRED';
+    trade.statusDescription = 'Trade manually closed.';
   }
 }
 
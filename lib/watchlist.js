@@ -1,13 +1,15 @@
 // lib/watchlist.js
 // The 25 most liquid stocks/ETFs FlowHunter monitors
+// Frozen — shared by every scan and never mutated.
+// Deduplicated (order kept) so a repeated symbol can't double the API calls.
 
-export const WATCHLIST = [
+export const WATCHLIST = Object.freeze([...new Set([
   'SPY', 'QQQ', 'AAPL', 'MSFT', 'NVDA',
   'AMZN', 'TSLA', 'META', 'GOOGL', 'AMD',
   'NFLX', 'JPM', 'V', 'BA', 'DIS',
   'COIN', 'SOFI', 'PLTR', 'XOM', 'IWM',
   'GLD', 'TLT', 'SMCI', 'MU', 'CRM',
-];
+])]);
 
 // Hard rules
 export const MIN_DTE = 14;
@@ -19,14 +21,17 @@ export const MIN_PREMIUM = 250000; // $250K min for flow detection
 export const VOL_OI_THRESHOLD = 1.5; // Volume/OI ratio trigger
 export const VOLUME_MULTIPLIER = 3; // 3x avg volume trigger
 
+// Option-chain side for a contract type — index the chain directly
+export const EXP_DATE_MAP_KEY = Object.freeze({ CALL: 'callExpDateMap', PUT: 'putExpDateMap' });
+
 // VIX Circuit Breaker
 export const VIX_CAUTION = 22;   // yellow warning on all bullish cards
 export const VIX_DANGER = 28;    // red warning, flag all bullish as high risk
 export const VIX_HALT = 35;      // pause all bullish suggestions entirely
 
 // Macro event calendar (manually maintained, update monthly)
-export const MACRO_EVENTS = [
+export const MACRO_EVENTS = Object.freeze([
   // Add FOMC, CPI, etc dates here
   // { type: 'FOMC', date: '2026-03-19', description: 'FOMC Rate Decision' },
   // { type: 'CPI', date: '2026-04-10', description: 'CPI Report' },
-];
+]);